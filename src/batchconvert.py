@@ -0,0 +1,45 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from directrender import markdown_to_html
+from markdown_blocks import inline_cache_info, set_inline_cache_size
+
+
+def markdown_to_html_batch(markdowns, jobs=1, chunk_size=256):
+    # Converts an iterable of markdown snippets (comments, cards) to HTML
+    # strings, yielded in input order. With jobs > 1 the snippets go to worker
+    # processes in chunks, so the per-task pickling and IPC is paid once per
+    # chunk instead of once per snippet.
+    if jobs <= 1:
+        for chunk in iter_chunks(markdowns, chunk_size):
+            yield from convert_chunk(chunk)
+        return
+
+    inline_info = inline_cache_info()
+    inline_cache_size = inline_info.maxsize if inline_info is not None else 0
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=set_inline_cache_size, initargs=(inline_cache_size,)
+    ) as executor:
+        # Keep a couple of chunks per worker in flight; the input may be a
+        # generator too big to submit all at once
+        pending = deque()
+        for chunk in iter_chunks(markdowns, chunk_size):
+            pending.append(executor.submit(convert_chunk, chunk))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def convert_chunk(markdowns):
+    return [markdown_to_html(markdown) for markdown in markdowns]
@@ -0,0 +1,288 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from batchconvert import markdown_to_html_batch
+from corpus import corpus_shapes, make_page, make_paragraph, make_snippet
+from directrender import markdown_to_html
+from generatepage import generate_pages_recursive
+from inline_markdown import text_to_textnodes, text_to_textnodes_multipass
+from markdown_blocks import markdown_to_blocks, markdown_to_html_node
+from pagecache import BodyCache
+
+benchmark_template = """<!DOCTYPE html>
+<html>
+<head><title> {{ Title }} </title></head>
+<body><article>{{ Content }}</article></body>
+</html>
+"""
+
+
+def write_site(root, pages, depth, shape="mixed", size=500):
+    # Spread pages over a directory chain `depth` levels deep
+    content_dir = os.path.join(root, "content")
+    for i in range(pages):
+        parts = [f"level{level}" for level in range(i % (depth + 1))]
+        dir_path = os.path.join(content_dir, *parts)
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, f"page{i}.md"), "w") as f:
+            f.write(corpus_shapes[shape](size).replace("# ", f"# {i} ", 1))
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write(benchmark_template)
+    return content_dir, template_path
+
+
+def time_call(fn, *args, repeat=5):
+    # Best of a few runs, which is the least noisy number on a busy machine
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_pipeline(shape, size, repeat):
+    markdown = corpus_shapes[shape](size)
+    blocks = markdown_to_blocks(markdown)
+    paragraph = make_paragraph(size)
+    node = markdown_to_html_node(markdown)
+    return {
+        "bytes": len(markdown.encode("utf-8")),
+        "markdown_to_blocks": time_call(markdown_to_blocks, markdown, repeat=repeat),
+        "text_to_textnodes": time_call(text_to_textnodes, paragraph, repeat=repeat),
+        "markdown_to_html_node": time_call(markdown_to_html_node, markdown, repeat=repeat),
+        "to_html": time_call(node.to_html, repeat=repeat),
+        "markdown_to_html": time_call(markdown_to_html, markdown, repeat=repeat),
+        "blocks": len(blocks),
+    }
+
+
+def bench_build(pages, depth, size, repeat, jobs=1):
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, template_path = write_site(root, pages, depth, size=size)
+        dest_dir = os.path.join(root, "public")
+
+        def build(cache=None):
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(
+                    content_dir, template_path, dest_dir, jobs=jobs, cache=cache
+                )
+
+        # A warm body cache is what a template-only change sees
+        cache = BodyCache(os.path.join(root, "cache"))
+        build(cache)
+
+        return {
+            "pages": pages,
+            "depth": depth,
+            "jobs": jobs,
+            "generate_pages_recursive": time_call(build, repeat=repeat),
+            "warm_body_cache": time_call(build, cache, repeat=repeat),
+        }
+
+
+def bench_inline(words):
+    paragraph = make_paragraph(words)
+    multipass = time_call(text_to_textnodes_multipass, paragraph)
+    single_pass = time_call(text_to_textnodes, paragraph)
+    return {
+        "words": words,
+        "multipass": multipass,
+        "single_pass": single_pass,
+        "speedup": multipass / single_pass,
+    }
+
+
+def bench_batch(snippets, jobs=1):
+    corpus = [make_snippet(i) for i in range(snippets)]
+
+    # Same renderer as the batch API, so the comparison only measures batching
+    def one_by_one():
+        for markdown in corpus:
+            markdown_to_html(markdown)
+
+    def batch(jobs):
+        for _ in markdown_to_html_batch(corpus, jobs):
+            pass
+
+    timings = {"one_by_one": time_call(one_by_one, repeat=3), "batch": time_call(batch, 1, repeat=3)}
+    if jobs > 1:
+        timings[f"batch_{jobs}_jobs"] = time_call(batch, jobs, repeat=3)
+    # Rates are stored as ints so --compare, which only compares timings, skips them
+    return {
+        "snippets": snippets,
+        **timings,
+        "per_second": {name: round(snippets / elapsed) for name, elapsed in timings.items()},
+    }
+
+
+def peak_rss_bytes():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def bench_memory(pages):
+    # Keep every page's tree alive at once, like a long-lived process would
+    corpus = [make_page(i) for i in range(pages)]
+    text_bytes = sum(len(page.encode("utf-8")) for page in corpus)
+    tracemalloc.start()
+    trees = [markdown_to_html_node(page) for page in corpus]
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del trees
+    return {
+        "pages": pages,
+        "text_bytes": text_bytes,
+        "tree_peak_bytes": traced_peak,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def flatten(results, prefix=""):
+    # {"pipeline": {"links": {"to_html": 0.1}}} -> {"pipeline.links.to_html": 0.1}
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def print_results(results):
+    for name, value in flatten(results).items():
+        if isinstance(value, float):
+            print(f"  {name:<50} {value * 1000:10.2f} ms")
+        else:
+            print(f"  {name:<50} {value:10}")
+
+
+def print_comparison(results, baseline):
+    # Only timings are compared; ratios above 1 mean this run was slower
+    current = flatten(results)
+    previous = flatten(baseline.get("results", {}))
+    print(f"compared with {baseline.get('revision') or 'baseline'}:")
+    for name, value in current.items():
+        old = previous.get(name)
+        if not isinstance(value, float) or not old:
+            continue
+        print(f"  {name:<50} {old * 1000:10.2f} -> {value * 1000:10.2f} ms  ({value / old:.2f}x)")
+
+
+def print_inline(result):
+    print(f"text_to_textnodes on a {result['words']}-word paragraph")
+    print(f"  multipass:   {result['multipass'] * 1000:.2f} ms")
+    print(f"  single pass: {result['single_pass'] * 1000:.2f} ms")
+    print(f"  speedup:     {result['speedup']:.1f}x")
+
+
+def print_memory(result):
+    mib = 1024 * 1024
+    print(f"markdown_to_html_node trees for {result['pages']} pages")
+    print(f"  markdown text:   {result['text_bytes'] / mib:.1f} MiB")
+    print(f"  trees (traced):  {result['tree_peak_bytes'] / mib:.1f} MiB")
+    print(f"  peak RSS:        {result['peak_rss_bytes'] / mib:.1f} MiB")
+
+
+def print_batch(result):
+    print(f"markdown to HTML for {result['snippets']} small snippets")
+    for name, rate in result["per_second"].items():
+        print(f"  {name + ':':<16} {rate:10} snippets/s")
+
+
+def main():
+    suite_names = ["pipeline", "build", "inline", "memory", "batch"]
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline")
+    parser.add_argument(
+        "suites",
+        nargs="*",
+        help=f"which benchmarks to run: {', '.join(suite_names)} (default: all)",
+    )
+    parser.add_argument(
+        "--shapes",
+        nargs="+",
+        choices=sorted(corpus_shapes),
+        default=sorted(corpus_shapes),
+        help="document shapes for the pipeline suite",
+    )
+    parser.add_argument("--size", type=int, default=2000, help="size knob for each document shape")
+    parser.add_argument("--words", type=int, default=20000, help="words per paragraph for the inline suite")
+    parser.add_argument("--pages", type=int, default=200, help="pages for the build and memory suites")
+    parser.add_argument("--depth", type=int, default=6, help="directory depth for the build suite")
+    parser.add_argument("--snippets", type=int, default=20000, help="snippets for the batch suite")
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="worker processes for the build and batch suites"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is kept")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    args = parser.parse_args()
+    if not args.suites:
+        args.suites = suite_names
+    for suite in args.suites:
+        if suite not in suite_names:
+            parser.error(f"unknown suite: {suite}")
+
+    results = {}
+    if "pipeline" in args.suites:
+        results["pipeline"] = {
+            shape: bench_pipeline(shape, args.size, args.repeat) for shape in args.shapes
+        }
+    if "build" in args.suites:
+        results["build"] = bench_build(args.pages, args.depth, 500, min(args.repeat, 3), args.jobs)
+    if "inline" in args.suites:
+        results["inline"] = bench_inline(args.words)
+        print_inline(results["inline"])
+    if "memory" in args.suites:
+        results["memory"] = bench_memory(args.pages)
+        print_memory(results["memory"])
+    if "batch" in args.suites:
+        results["batch"] = bench_batch(args.snippets, args.jobs)
+        print_batch(results["batch"])
+
+    print("results:")
+    print_results({key: value for key, value in results.items() if key in ("pipeline", "build")})
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "arguments": vars(args),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import json
+import os
+
+from generatepage import collect_pages
+
+index_filename = "content-index.json"
+
+
+class PageRecord:
+    __slots__ = ("src_path", "dest_path", "size", "mtime_ns", "digest", "title", "links")
+
+    def __init__(self, src_path, dest_path, size, mtime_ns, digest=None, title=None, links=None):
+        self.src_path = src_path
+        self.dest_path = dest_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        # The source hash, filled in by the first build that needs it
+        self.digest = digest
+        # The title and link targets, filled in when the page is rendered
+        self.title = title
+        self.links = links
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.__slots__})
+
+    def __repr__(self):
+        return f"PageRecord({self.src_path}, {self.dest_path}, {self.size}, {self.title})"
+
+
+class ContentIndex:
+    # Every page in the content tree, discovered with one stat per page before
+    # anything is rendered. Pages whose size and mtime match the previous index
+    # keep its source hash, title and links, so they are not read again to
+    # check the manifest.
+    def __init__(self, pages=None):
+        self.pages = pages if pages is not None else []
+
+    @classmethod
+    def build(cls, dir_path_content, dest_dir_path, previous=None):
+        known = {}
+        if previous is not None:
+            known = {record.src_path: record for record in previous.pages}
+        index = cls()
+        for src_path, dest_path in collect_pages(dir_path_content, dest_dir_path):
+            stat = os.stat(src_path)
+            record = known.get(src_path)
+            if (
+                record is None
+                or record.size != stat.st_size
+                or record.mtime_ns != stat.st_mtime_ns
+                or record.dest_path != dest_path
+            ):
+                record = PageRecord(src_path, dest_path, stat.st_size, stat.st_mtime_ns)
+            index.pages.append(record)
+        return index
+
+    def get(self, src_path):
+        for record in self.pages:
+            if record.src_path == src_path:
+                return record
+        return None
+
+    def by_size(self):
+        # Largest first, so the slowest pages start early in a parallel build
+        return sorted(self.pages, key=lambda record: record.size, reverse=True)
+
+    def backlinks(self, target):
+        # Pages that haven't been rendered yet have no links recorded
+        return [record for record in self.pages if record.links and target in record.links]
+
+    def save(self, index_path):
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        with open(index_path, "w") as f:
+            json.dump([record.to_dict() for record in self.pages], f)
+
+    @classmethod
+    def load(cls, index_path):
+        # A missing or unreadable index just means every page gets hashed
+        try:
+            with open(index_path, "r") as f:
+                data = json.load(f)
+            return cls([PageRecord.from_dict(entry) for entry in data])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
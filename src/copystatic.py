@@ -1,17 +1,126 @@
+import errno
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows; reflinks just fall back to copies there
+    fcntl = None
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+from manifest import hash_file, stat_fingerprint
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
+copy_methods = ("copy", "hardlink", "reflink")
 
+# from linux/fs.h; asks the filesystem to share the source's blocks
+FICLONE = 0x40049409
+
+
+def copy_files_recursive(
+    source_dir_path,
+    dest_dir_path,
+    manifest=None,
+    method="copy",
+    checksum=False,
+    threads=1,
+    log=print,
+):
+    copies = collect_copies(source_dir_path, dest_dir_path, manifest, checksum, method, log)
+    if threads <= 1 or len(copies) <= 1:
+        for from_path, dest_path, digest in copies:
+            place_file(from_path, dest_path, method)
+            if manifest is not None:
+                manifest.record(from_path, dest_path, digest)
+        return
+
+    # The copies are I/O bound, so a bounded thread pool keeps several in flight.
+    # Results are handled in walk order and only this thread touches the manifest.
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(place_file, from_path, dest_path, method)
+            for from_path, dest_path, _ in copies
+        ]
+        for (from_path, dest_path, digest), future in zip(copies, futures):
+            future.result()
+            if manifest is not None:
+                manifest.record(from_path, dest_path, digest)
+
+
+def collect_copies(
+    source_dir_path, dest_dir_path, manifest=None, checksum=False, method="copy", log=print
+):
+    # Walk the tree with scandir, whose entries already know their type, and
+    # return the (from, to, digest) copies that are actually needed
+    os.makedirs(dest_dir_path, exist_ok=True)
+
+    copies = []
+    with os.scandir(source_dir_path) as entries:
+        for entry in entries:
+            from_path = entry.path
+            dest_path = os.path.join(dest_dir_path, entry.name)
+            if entry.is_file():
+                # Skip assets that match what the last build placed. By default
+                # that costs one stat; checksum hashes the contents instead.
+                # The copy method is part of the digest, so switching it
+                # re-places every asset.
+                digest = None
+                if manifest is not None:
+                    digest = hash_file(from_path) if checksum else stat_fingerprint(entry)
+                    digest = f"{method}:{digest}"
+                    if manifest.is_fresh(from_path, dest_path, digest):
+                        continue
+                log(f" * {from_path} -> {dest_path}")
+                copies.append((from_path, dest_path, digest))
+            elif entry.is_dir():
+                # Only mention the directory when something under it is copied
+                lines = []
+                dir_copies = collect_copies(
+                    from_path, dest_path, manifest, checksum, method, lines.append
+                )
+                if dir_copies:
+                    log(f" * {from_path} -> {dest_path}")
+                    for line in lines:
+                        log(line)
+                copies.extend(dir_copies)
+    return copies
+
+
+def place_file(from_path, dest_path, method="copy"):
+    if method == "hardlink":
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(from_path, dest_path)
+            return
+        except OSError:
+            # e.g. static/ and public/ live on different filesystems
+            pass
+    elif method == "reflink":
+        if reflink(from_path, dest_path):
+            return
+    elif method != "copy":
+        raise ValueError(f"Invalid copy method: {method}")
+    # dest may still be a hardlink to from_path from an earlier build, which
+    # copy2 refuses to copy onto (and would otherwise write through)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    shutil.copy2(from_path, dest_path)
+
+
+def reflink(from_path, dest_path):
+    # Copy-on-write clone (btrfs, XFS). Returns False when the filesystem
+    # can't do it, so the caller can fall back to a plain copy.
+    if fcntl is None:
+        return False
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    with open(from_path, "rb") as source, open(dest_path, "wb") as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL):
+                raise
+            return False
+    shutil.copystat(from_path, dest_path)
+    return True
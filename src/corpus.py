@@ -0,0 +1,72 @@
+# Synthetic markdown shared by the benchmarks and the renderer tests
+
+inline_words = [
+    "the", "quick", "**brown**", "fox", "*jumps*", "over", "`lazy`", "dog",
+    "[link](https://example.com)", "![img](/images/a.png)", "and", "more",
+]
+
+
+def make_paragraph(words):
+    return " ".join(inline_words[i % len(inline_words)] for i in range(words))
+
+
+def make_link_list(links):
+    return "\n".join(f"- [page {i}](/pages/{i}) and [mirror](https://example.com/{i})" for i in range(links))
+
+
+def make_code_block(lines):
+    return "```\n" + "\n".join(f"    value_{i} = compute({i}) * 2" for i in range(lines)) + "\n```"
+
+
+# Synthetic document shapes. Each takes a size knob and returns markdown.
+corpus_shapes = {
+    # a few very long paragraphs full of inline markup
+    "paragraphs": lambda size: "\n\n".join(
+        ["# Long paragraphs"] + [make_paragraph(size) for _ in range(5)]
+    ),
+    # generated index pages made mostly of links
+    "links": lambda size: "\n\n".join(
+        ["# Link index"] + [make_link_list(size // 10) for _ in range(10)]
+    ),
+    # big fenced code blocks
+    "code": lambda size: "\n\n".join(
+        ["# Code listing"] + [make_code_block(size // 5) for _ in range(5)]
+    ),
+    # a bit of everything, roughly like a normal article
+    "mixed": lambda size: "\n\n".join(
+        ["# Mixed article"]
+        + [
+            block
+            for i in range(max(size // 100, 1))
+            for block in (
+                f"## Section {i}",
+                make_paragraph(80),
+                make_link_list(5),
+                "> " + make_paragraph(20),
+                "1. first\n2. second\n3. third",
+                make_code_block(4),
+            )
+        ]
+    ),
+}
+
+
+def make_page(index):
+    return "\n\n".join(
+        [
+            f"# Page {index}",
+            make_paragraph(120),
+            "## Section",
+            "\n".join(f"- item {i} with [a link](/p/{i})" for i in range(10)),
+            "> " + make_paragraph(30),
+            "```\ncode line\nanother line\n```",
+        ]
+    )
+
+
+def make_snippet(index):
+    # Comment-sized documents: a line or two, sometimes a short list
+    snippet = make_paragraph(8 + index % 24)
+    if index % 3 == 0:
+        snippet += "\n\n- first point\n- second point"
+    return snippet
@@ -0,0 +1,183 @@
+from html import escape
+
+import markdown_blocks
+from inline_markdown import image_pattern, link_pattern
+from markdown_blocks import (
+    block_to_block_type,
+    block_type_code,
+    block_type_heading,
+    block_type_olist,
+    block_type_paragraph,
+    block_type_quote,
+    block_type_ulist,
+    markdown_to_blocks,
+)
+
+# Renders markdown straight to HTML chunks, without building TextNode lists or
+# an HTMLNode tree. The output is byte-identical to
+# markdown_to_html_node(markdown).to_html(); markdown_to_html_node stays the
+# way to get the tree itself.
+
+# Same order as inline_delimiters, with the tags text_node_to_html_node uses
+direct_delimiters = (
+    ("**", "<b>", "</b>"),
+    ("*", "<i>", "</i>"),
+    ("`", "<code>", "</code>"),
+)
+
+
+def markdown_to_html(markdown):
+    return blocks_to_html(markdown_to_blocks(markdown))
+
+
+def blocks_to_html(blocks):
+    chunks = ["<div>"]
+    write = chunks.append
+    for block in blocks:
+        write_block(block, write)
+    write("</div>")
+    return "".join(chunks)
+
+
+class DirectDocument:
+    # Renders an iterable of blocks (such as iter_blocks over a file) one at a
+    # time, so the whole body string is never built
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def render_to(self, write):
+        write("<div>")
+        for block in self.blocks:
+            write_block(block, write)
+        write("</div>")
+
+    def to_html(self):
+        return blocks_to_html(self.blocks)
+
+
+def write_block(block, write):
+    writer = block_writers.get(block_to_block_type(block))
+    if writer is None:
+        raise ValueError("Invalid block type")
+    writer(block, write)
+
+
+def write_inline(text, write):
+    # With the inline memo turned on, share its entries and hit counts
+    if markdown_blocks.inline_cache is not None:
+        for node in markdown_blocks.inline_cache(text):
+            write(node.to_html())
+        return
+    scan_delimited(text, 0, len(text), 0, write)
+
+
+def scan_delimited(text, start, end, level, write):
+    # Mirrors inline_markdown.scan_delimited, writing HTML instead of TextNodes
+    if level == len(direct_delimiters):
+        scan_images(text, start, end, write)
+        return
+    delimiter, open_tag, close_tag = direct_delimiters[level]
+    width = len(delimiter)
+    position = start
+    while True:
+        opening = text.find(delimiter, position, end)
+        if opening == -1:
+            scan_delimited(text, position, end, level + 1, write)
+            return
+        closing = text.find(delimiter, opening + width, end)
+        if closing == -1:
+            raise ValueError("Invalid markdown, formatted section not closed")
+        scan_delimited(text, position, opening, level + 1, write)
+        if closing > opening + width:
+            write(open_tag)
+            write(text[opening + width : closing])
+            write(close_tag)
+        position = closing + width
+
+
+def scan_images(text, start, end, write):
+    position = start
+    for match in image_pattern.finditer(text, start, end):
+        scan_links(text, position, match.start(), write)
+        write(f'<img src="{escape(match.group(2))}" alt="{escape(match.group(1))}"></img>')
+        position = match.end()
+    scan_links(text, position, end, write)
+
+
+def scan_links(text, start, end, write):
+    position = start
+    for match in link_pattern.finditer(text, start, end):
+        if match.start() > position:
+            write(text[position : match.start()])
+        write(f'<a href="{escape(match.group(2))}">{match.group(1)}</a>')
+        position = match.end()
+    if end > position:
+        write(text[position:end])
+
+
+def write_paragraph(block, write):
+    write("<p>")
+    write_inline(" ".join(block.split("\n")), write)
+    write("</p>")
+
+
+def write_heading(block, write):
+    level = 0
+    for char in block:
+        if char == "#":
+            level += 1
+        else:
+            break
+    if level + 1 >= len(block):
+        raise ValueError(f"Invalid heading level: {level}")
+    write(f"<h{level}>")
+    write_inline(block[level + 1 :], write)
+    write(f"</h{level}>")
+
+
+def write_code(block, write):
+    if not block.startswith("```") or not block.endswith("```"):
+        raise ValueError("Invalid code block")
+    write("<pre><code>")
+    write_inline(block[4:-3], write)
+    write("</code></pre>")
+
+
+def write_olist(block, write):
+    write("<ol>")
+    for item in block.split("\n"):
+        write("<li>")
+        write_inline(item[3:], write)
+        write("</li>")
+    write("</ol>")
+
+
+def write_ulist(block, write):
+    write("<ul>")
+    for item in block.split("\n"):
+        write("<li>")
+        write_inline(item[2:], write)
+        write("</li>")
+    write("</ul>")
+
+
+def write_quote(block, write):
+    lines = block.split("\n")
+    new_lines = []
+    for line in lines:
+        if not line.startswith(">"):
+            raise ValueError("Invalid quote block")
+        new_lines.append(line.lstrip(">").strip())
+    write("<blockquote>")
+    write_inline(" ".join(new_lines), write)
+    write("</blockquote>")
+
+
+block_writers = {
+    block_type_paragraph: write_paragraph,
+    block_type_heading: write_heading,
+    block_type_code: write_code,
+    block_type_olist: write_olist,
+    block_type_ulist: write_ulist,
+    block_type_quote: write_quote,
+}
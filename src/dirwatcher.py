@@ -0,0 +1,127 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+
+# Linux inotify through ctypes: the kernel reports which paths changed, so an
+# idle watch loop costs nothing instead of a stat per file per tick.
+
+in_modify = 0x2
+in_attrib = 0x4
+in_close_write = 0x8
+in_moved_from = 0x40
+in_moved_to = 0x80
+in_create = 0x100
+in_delete = 0x200
+in_delete_self = 0x400
+in_move_self = 0x800
+in_q_overflow = 0x4000
+in_ignored = 0x8000
+in_isdir = 0x40000000
+
+watch_mask = (
+    in_modify
+    | in_attrib
+    | in_close_write
+    | in_moved_from
+    | in_moved_to
+    | in_create
+    | in_delete
+    | in_delete_self
+    | in_move_self
+)
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+event_header = struct.Struct("iIII")
+
+
+class DirWatcher:
+    # Watches every directory under the given roots. wait() returns the set of
+    # paths that changed, or None when events were lost and the caller has to
+    # rescan everything.
+    def __init__(self, libc, fd, roots):
+        self.libc = libc
+        self.fd = fd
+        self.dirs = {}
+        for root in roots:
+            if os.path.isdir(root):
+                self.add_tree(root)
+
+    @classmethod
+    def open(cls, roots):
+        # None where inotify isn't available; the caller falls back to polling
+        if not hasattr(os, "O_NONBLOCK"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            init = libc.inotify_init1
+        except (OSError, AttributeError):
+            return None
+        fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        try:
+            return cls(libc, fd, roots)
+        except OSError:
+            # e.g. more directories than fs.inotify.max_user_watches allows
+            os.close(fd)
+            return None
+
+    def add_tree(self, dir_path):
+        stack = [dir_path]
+        while stack:
+            path = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), watch_mask)
+            if wd < 0:
+                error = ctypes.get_errno()
+                # the directory may already be gone again
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, os.strerror(error), path)
+            self.dirs[wd] = path
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = event_header.unpack_from(data, offset)
+                offset += event_header.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & in_q_overflow:
+                    overflowed = True
+                    continue
+                if mask & in_ignored:
+                    # the directory was removed; its parent reports that
+                    self.dirs.pop(wd, None)
+                    continue
+                dir_path = self.dirs.get(wd)
+                if dir_path is None:
+                    continue
+                path = os.path.join(dir_path, os.fsdecode(name)) if name else dir_path
+                changed.add(path)
+                if mask & in_isdir and mask & (in_create | in_moved_to):
+                    # new directories need watches of their own
+                    self.add_tree(path)
+        return None if overflowed else changed
+
+    def close(self):
+        os.close(self.fd)
@@ -1,61 +1,355 @@
+import multiprocessing
 import os
-from markdown_blocks import markdown_to_html_node
+from concurrent.futures import ProcessPoolExecutor
+
+from directrender import DirectDocument, blocks_to_html
+from inline_markdown import extract_markdown_links
+from manifest import hash_file, hash_strings
+from markdown_blocks import (
+    add_worker_inline_counts,
+    inline_cache_info,
+    markdown_to_blocks,
+    set_inline_cache_size,
+)
+from mappedsource import MappedSource
+from outputfile import OutputFile, write_output
+from pagecache import generator_version
+from profiler import PageProfile, stage
+from template import Template
 
 def generate_page(from_path, template_path, dest_path):
     print(f" * {from_path} {template_path} -> {dest_path}")
-    
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
+    render_page(from_path, Template.load(template_path), dest_path)
+
+# Markdown files at least this big are parsed and written block by block
+stream_threshold = 8 * 1024 * 1024
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
+def render_page(from_path, template, dest_path, profile=None, cache=None):
+    # Returns the page's title and link targets, for the content index.
+    # The cache needs the whole body and profiling times stages separately, so
+    # streaming only applies to plain builds
+    if cache is None and profile is None and os.path.getsize(from_path) >= stream_threshold:
+        return render_page_streaming(from_path, template, dest_path)
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+    with stage(profile, "read"):
+        from_file = open(from_path, "r")
+        markdown_content = from_file.read()
+        from_file.close()
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
+    if cache is None and profile is None:
+        # Nothing keeps the body around, so the template writes it out block
+        # by block instead of joining it into one string first
+        title = extract_title(markdown_content)
+        body = DirectDocument(markdown_to_blocks(markdown_content))
+    else:
+        title, body = page_body(markdown_content, profile, cache)
 
     dest_dir_path = os.path.dirname(dest_path)
     if dest_dir_path != "":
         os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
-        
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    # Make sure the destination directory exists
-    os.makedirs(dest_dir_path, exist_ok=True)
-    
-    # Loop through everything in the current directory
-    for entry in os.listdir(dir_path_content):
-        # Create full path for source
+
+    with stage(profile, "links"):
+        links = page_links(markdown_content)
+
+    if profile is None:
+        if cache is None:
+            # The body is a DirectDocument, so the page is streamed out and
+            # compared with the old one afterwards
+            with OutputFile(dest_path) as to_file:
+                template.render_to(to_file.write, {"Title": title, "Content": body})
+        else:
+            write_output(dest_path, template.render({"Title": title, "Content": body}))
+        return title, links
+
+    # Templating and writing overlap when streaming, so the profiled path
+    # does them one after another to time each on its own
+    with profile.stage("template"):
+        page = template.render({"Title": title, "Content": body})
+    with profile.stage("write"):
+        write_output(dest_path, page)
+    return title, links
+
+def page_links(markdown):
+    return [url for _, url in extract_markdown_links(markdown)]
+
+def page_body(markdown_content, profile=None, cache=None):
+    # Returns (title, body html)
+    if cache is not None:
+        with stage(profile, "cache"):
+            cache_key = cache.key(markdown_content)
+            cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    with stage(profile, "blocks"):
+        blocks = markdown_to_blocks(markdown_content)
+    # Pages never need the node tree, so blocks are rendered straight to HTML;
+    # parsing and rendering are one step on this path
+    with stage(profile, "parse"):
+        body = blocks_to_html(blocks)
+
+    with stage(profile, "title"):
+        title = extract_title(markdown_content)
+
+    if cache is not None:
+        with stage(profile, "cache"):
+            cache.put(cache_key, title, body)
+    return title, body
+
+def render_page_streaming(from_path, template, dest_path):
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    with MappedSource(from_path) as source:
+        # The title usually sits on the first line, so this pass stops early
+        title = title_from_lines(source.lines())
+        links = []
+        with OutputFile(dest_path) as to_file:
+            template.render_to(
+                to_file.write,
+                {"Title": title, "Content": DirectDocument(collect_links(source.blocks(), links))},
+            )
+    return title, links
+
+def collect_links(blocks, links):
+    # Passes the blocks through, adding each one's link targets to links
+    for block in blocks:
+        links.extend(page_links(block))
+        yield block
+
+def collect_pages(dir_path_content, dest_dir_path):
+    # Walk the content tree up front so the whole page list is known before rendering
+    pages = []
+    # Sorted, so the page order (and the build log) is the same on every filesystem
+    for entry in sorted(os.listdir(dir_path_content)):
         src_path = os.path.join(dir_path_content, entry)
-        
+
         if os.path.isfile(src_path):
-            # If it's a markdown file, process it
             if entry.endswith('.md'):
-                # What should the output HTML file be named?
-                html_file = entry.replace('.md', '.html')
-                # Where should we put it?
-                dest_path = os.path.join(dest_dir_path, html_file)
-                # Generate the HTML page
-                generate_page(src_path, template_path, dest_path)
-        
+                pages.append((src_path, os.path.join(dest_dir_path, html_filename(entry))))
+
         elif os.path.isdir(src_path):
-            # If it's a directory, we need to:
-            # 1. Create corresponding directory in dest_dir_path
-            new_dest_dir = os.path.join(dest_dir_path, entry)
-            # 2. Recursively process that directory
-            generate_pages_recursive(src_path, template_path, new_dest_dir)
-
-          
-    
+            pages.extend(collect_pages(src_path, os.path.join(dest_dir_path, entry)))
+    return pages
+
+def html_filename(filename):
+    # What should the output HTML file be named?
+    return filename.replace('.md', '.html')
+
+def page_dest_path(src_path, dir_path_content, dest_dir_path):
+    rel_path = os.path.relpath(src_path, dir_path_content)
+    rel_dir, filename = os.path.split(rel_path)
+    return os.path.join(dest_dir_path, rel_dir, html_filename(filename))
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest=None,
+    jobs=1,
+    profile=None,
+    cache=None,
+    index=None,
+    template=None,
+):
+    # Make sure the destination directory exists
+    os.makedirs(dest_dir_path, exist_ok=True)
+
+    # A content index already knows every page, and the source hash of pages
+    # that haven't changed since it was saved. Rendered pages fill in their
+    # title and links.
+    if index is not None:
+        pages = [(record.src_path, record.dest_path) for record in index.pages]
+        records = {record.src_path: record for record in index.pages}
+    else:
+        pages = collect_pages(dir_path_content, dest_dir_path)
+        records = {}
+
+    # With a manifest, a page only needs rebuilding when its markdown, the
+    # template or the generator code changed
+    digests = {}
+    if manifest is not None:
+        template_hash = hash_file(template_path)
+        pending = []
+        for src_path, dest_path in pages:
+            record = records.get(src_path)
+            if record is None:
+                source_hash = hash_file(src_path)
+            else:
+                if record.digest is None:
+                    # Saved with the index, so the next build can skip hashing it
+                    record.digest = hash_file(src_path)
+                source_hash = record.digest
+            digest = hash_strings(source_hash, template_hash, generator_version)
+            if manifest.is_fresh(src_path, dest_path, digest):
+                continue
+            digests[src_path] = digest
+            pending.append((src_path, dest_path))
+        pages = pending
+
+    # Read and split the template once for the whole build, unless the caller
+    # already has it compiled
+    if template is None:
+        template = Template.load(template_path)
+
+    if jobs > 1 and len(pages) > 1:
+        # With an index the largest pages are submitted first, so one big page
+        # doesn't start last and hold up the end of the build
+        schedule = None
+        if index is not None:
+            pending = set(pages)
+            schedule = [
+                (record.src_path, record.dest_path)
+                for record in index.by_size()
+                if (record.src_path, record.dest_path) in pending
+            ]
+        generate_pages_parallel(
+            pages,
+            template_path,
+            template,
+            jobs,
+            manifest,
+            digests,
+            profile,
+            cache,
+            schedule,
+            records,
+        )
+        return
+
+    for src_path, dest_path in pages:
+        print(f" * {src_path} {template_path} -> {dest_path}")
+        page_profile = None
+        if profile is not None:
+            page_profile = PageProfile(src_path)
+            profile.add_page(page_profile)
+        page_info = render_page(src_path, template, dest_path, page_profile, cache)
+        record_page_info(records, src_path, page_info)
+        if manifest is not None:
+            manifest.record(src_path, dest_path, digests[src_path])
+
+def generate_pages_parallel(
+    pages,
+    template_path,
+    template,
+    jobs,
+    manifest=None,
+    digests=None,
+    profile=None,
+    cache=None,
+    schedule=None,
+    records=None,
+):
+    # Pages are independent, so parse and render them in worker processes. Results
+    # are consumed in page order, which keeps the log and manifest deterministic.
+    # Each worker receives the compiled template, the cache and the inline
+    # memo setting once, through its initializer.
+    inline_info = inline_cache_info()
+    inline_cache_size = inline_info.maxsize if inline_info is not None else 0
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=pool_context(),
+        initializer=init_worker,
+        initargs=(template, cache, inline_cache_size),
+    ) as executor:
+        # Pages are submitted in schedule order when one is given
+        futures = {
+            src_path: executor.submit(
+                render_page_in_worker, src_path, dest_path, profile is not None
+            )
+            for src_path, dest_path in (schedule if schedule is not None else pages)
+        }
+        for src_path, dest_path in pages:
+            future = futures[src_path]
+            try:
+                page_profile, page_info, counts = future.result()
+            except Exception:
+                print(f" ! {src_path} failed")
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+            print(f" * {src_path} {template_path} -> {dest_path}")
+            if profile is not None:
+                profile.add_page(page_profile)
+            # Each worker has its own copy of the body cache and inline memo,
+            # so their counts are sent back and added to these
+            cache_hits, cache_misses, inline_hits, inline_misses = counts
+            if cache is not None:
+                cache.hits += cache_hits
+                cache.misses += cache_misses
+            if inline_info is not None:
+                add_worker_inline_counts(inline_hits, inline_misses)
+            if records is not None:
+                record_page_info(records, src_path, page_info)
+            if manifest is not None:
+                manifest.record(src_path, dest_path, digests[src_path])
+
+def pool_context():
+    # Static files copy on a thread while pages render, and watch mode serves
+    # from one. Forking a process that has other threads can deadlock, so
+    # workers come from a fork server, which is single-threaded, where the
+    # platform has one.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return None
+
+def record_page_info(records, src_path, page_info):
+    record = records.get(src_path)
+    if record is not None:
+        record.title, record.links = page_info
+
+worker_template = None
+worker_cache = None
+
+def init_worker(template, cache=None, inline_cache_size=0):
+    global worker_template, worker_cache
+    worker_template = template
+    worker_cache = cache
+    set_inline_cache_size(inline_cache_size)
+
+def render_page_in_worker(from_path, dest_path, profiling=False):
+    # Returns the page profile, its title and links, and this page's counts:
+    # (body cache hits, body cache misses, inline memo hits, inline memo misses)
+    page_profile = PageProfile(from_path) if profiling else None
+    before = worker_counts()
+    page_info = render_page(from_path, worker_template, dest_path, page_profile, worker_cache)
+    after = worker_counts()
+    return page_profile, page_info, tuple(now - then for then, now in zip(before, after))
+
+def worker_counts():
+    counts = [0, 0, 0, 0]
+    if worker_cache is not None:
+        counts[0:2] = worker_cache.hits, worker_cache.misses
+    inline_info = inline_cache_info()
+    if inline_info is not None:
+        counts[2:4] = inline_info.hits, inline_info.misses
+    return counts
+
 def extract_title(markdown):
-    lines = markdown.split("\n")
+    # Only lines starting with '#' can be the title, so jump from one to the
+    # next with find and stop at the first H1 instead of splitting every line
+    start = 0
+    while True:
+        if markdown.startswith("#", start) and not markdown.startswith("##", start):
+            end = markdown.find("\n", start)
+            if end == -1:
+                end = len(markdown)
+            return heading_text(markdown[start:end])
+        start = markdown.find("\n#", start) + 1
+        if start == 0:
+            raise Exception("No title found. Error.")
+
+def title_from_lines(lines):
     for line in lines:
         if line.startswith("#") and not line.startswith("##"):
-            return "".join(line.split("#")).strip()
-    raise Exception("No title found. Error.")
\ No newline at end of file
+            return heading_text(line)
+    raise Exception("No title found. Error.")
+
+def heading_text(line):
+    # Drop the leading '#' and an optional closing run of '#'s ("# Title #"),
+    # but keep any '#' inside the title itself
+    text = line[1:].strip()
+    if text.endswith("#"):
+        closed = text.rstrip("#")
+        if closed == "" or closed[-1] in " \t":
+            text = closed.strip()
+    return text
\ No newline at end of file
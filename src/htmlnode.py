@@ -1,25 +1,57 @@
+from html import escape
+
+
 class HTMLNode:
+    # Pages build one node per block and per inline span; slots keep them small
+    __slots__ = ("tag", "value", "children", "props", "props_html")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
+        self.props_html = None
         
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
+
+    def iter_html(self):
+        # Walk the tree with an explicit stack instead of recursing, yielding the
+        # HTML in chunks. Closing tags are pushed as plain strings.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode):
+                node.validate()
+                yield f"<{node.tag}{node.props_to_html()}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield node.to_html()
+
+    def render_to(self, write):
+        for chunk in self.iter_html():
+            write(chunk)
     
     def props_to_html(self):
+        # Props are treated as immutable once the node is built, so the string
+        # is made once; memoized inline nodes then reuse it on every page
         if self.props is None:
             return ""
-        props = ''
-        for key, value in self.props.items():
-            props += f' {key}="{value}"'
-        return props
+        if self.props_html is None:
+            self.props_html = "".join(
+                [f' {key}="{escape(str(value))}"' for key, value in self.props.items()]
+            )
+        return self.props_html
     
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
     
@@ -34,18 +66,19 @@ class LeafNode(HTMLNode):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
         
-    def to_html(self):
+    def validate(self):
         if self.tag is None:
             raise ValueError("Tag must have a value")
         if self.children is None:
             raise ValueError("Must have children to render HTML")
-        inner_html = ''
-        for child in self.children:
-            inner_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{inner_html}</{self.tag}>"
+
+    def to_html(self):
+        return "".join(self.iter_html())
     
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
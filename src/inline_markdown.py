@@ -2,8 +2,58 @@ import re
 
 from textnode import TextNode, TextType
 
-# put all together
+image_pattern = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+link_pattern = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# checked in this order, same as the split passes below
+inline_delimiters = (
+    ("**", TextType.BOLD),
+    ("*", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+# put all together in one left-to-right walk over the text
 def text_to_textnodes(text):
+    nodes = []
+    scan_delimited(text, 0, len(text), 0, nodes)
+    return nodes
+
+def scan_delimited(text, start, end, level, nodes):
+    # Each delimiter level only looks at the plain text between the spans found by
+    # the level above it, which is exactly what chaining the split passes did, but
+    # works on offsets into the original string instead of new TextNode lists.
+    if level == len(inline_delimiters):
+        scan_images(text, start, end, nodes)
+        return
+    delimiter, text_type = inline_delimiters[level]
+    width = len(delimiter)
+    position = start
+    while True:
+        opening = text.find(delimiter, position, end)
+        if opening == -1:
+            scan_delimited(text, position, end, level + 1, nodes)
+            return
+        closing = text.find(delimiter, opening + width, end)
+        if closing == -1:
+            raise ValueError("Invalid markdown, formatted section not closed")
+        scan_delimited(text, position, opening, level + 1, nodes)
+        if closing > opening + width:
+            nodes.append(TextNode(text[opening + width : closing], text_type))
+        position = closing + width
+
+def scan_images(text, start, end, nodes):
+    position = start
+    for match in image_pattern.finditer(text, start, end):
+        scan_links(text, position, match.start(), nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    scan_links(text, position, end, nodes)
+
+def scan_links(text, start, end, nodes):
+    split_by_pattern(text, start, end, link_pattern, TextType.LINK, nodes)
+
+# the original multi-pass version, kept for comparison in tests and benchmarks
+def text_to_textnodes_multipass(text):
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, '**', TextType.BOLD)
     nodes = split_nodes_delimiter(nodes, '*', TextType.ITALIC)
@@ -35,10 +85,10 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 # more usefull markdown functions
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return image_pattern.findall(text)
     
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return link_pattern.findall(text)
 
 def split_nodes_link(old_nodes):
     result = []
@@ -61,34 +111,23 @@ def split_nodes_image(old_nodes):
     return result
 
 
-def get_markdown_pattern(type, alt_text, url):
-    if type == 'img':
-        return f"![{alt_text}]({url})"
-    return f"[{alt_text}]({url})"
-
-def extract_text_by_type(type, text):
-    if type == 'img':
-        return extract_markdown_images(text)
-    return extract_markdown_links(text)
-    
 def extract_img_or_link(old_node, type):
+    # One finditer scan over the node's text, slicing by match offsets.
+    # The caller's node is left untouched.
+    if type == 'img':
+        pattern, text_type = image_pattern, TextType.IMAGE
+    else:
+        pattern, text_type = link_pattern, TextType.LINK
     new_nodes = []
-    while True:
-        extract_by_type = extract_text_by_type(type, old_node.text)
-        if len(extract_by_type) == 0:
-            if len(old_node.text) > 0:
-                new_nodes.append(TextNode(old_node.text, TextType.TEXT))
-            break
-        param1, param2 = extract_by_type[0]
-        markdown = get_markdown_pattern(type, param1, param2)
-        if len(markdown) == 0:
-            break
-        sections = old_node.text.split(markdown, 1)
-        if len(sections[0]) > 0:
-            new_nodes.append(TextNode(sections[0], TextType.TEXT))
-        if type == 'img':
-            new_nodes.append(TextNode(param1, TextType.IMAGE, param2))
-        else:
-            new_nodes.append(TextNode(param1, TextType.LINK, param2))
-        old_node.text = sections[1]
+    split_by_pattern(old_node.text, 0, len(old_node.text), pattern, text_type, new_nodes)
     return new_nodes
+
+def split_by_pattern(text, start, end, pattern, text_type, nodes):
+    position = start
+    for match in pattern.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position : match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        position = match.end()
+    if end > position:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
@@ -1,23 +1,195 @@
+import argparse
+import asyncio
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
-from copystatic import copy_files_recursive
+from contentindex import ContentIndex, index_filename
+from copystatic import copy_files_recursive, copy_methods
 from generatepage import generate_pages_recursive
+from manifest import Manifest
+from markdown_blocks import inline_cache_info, set_inline_cache_size
+from pagecache import BodyCache
+from previewserver import serve_preview
+from profiler import BuildProfile, stage
+from watch import DevBuilder, watch
 
 dir_path_static = "./static"
 dir_path_public = "./public"
 dir_path_content = "./content"  # Add this line
+# Build state that must not be served or deployed with ./public
+dir_path_cache = "./.cache"
 template_path = "template.html"
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the static site into ./public")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild pages and assets whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "--copy-method",
+        choices=copy_methods,
+        default="copy",
+        help="how static files are placed in ./public; hardlink and reflink fall back to copy",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="with --incremental, compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--copy-threads",
+        type=int,
+        default=8,
+        metavar="N",
+        help="copy static files with up to N threads (default: 8)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="render pages across N worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="cache rendered page bodies in DIR so template-only changes skip parsing",
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        default=0,
+        metavar="N",
+        help="memoize inline parsing of up to N distinct text fragments (default: off)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build and page stage and print the slowest pages and stages",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="with --profile, also write a Chrome trace event file (chrome://tracing, Perfetto)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve ./public and rebuild changed pages and assets as files change",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="run a preview server that renders markdown POSTed to /preview",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="port for the --watch and --preview servers (default: 8888)",
+    )
+    return parser.parse_args()
+
 def main():
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+    args = parse_args()
+    cache = BodyCache(args.cache_dir) if args.cache_dir else None
+    set_inline_cache_size(args.inline_cache)
+    if args.preview:
+        try:
+            asyncio.run(serve_preview(template_path, args.port, args.jobs))
+        except KeyboardInterrupt:
+            print("Stopping...")
+        return
+    if args.watch:
+        builder = DevBuilder(
+            dir_path_content, dir_path_static, template_path, dir_path_public, args.jobs, cache
+        )
+        watch(builder, args.port)
+        return
+
+    profile = BuildProfile() if args.profile or args.trace else None
+
+    # Sources whose size and mtime match the last index are not hashed again
+    index_path = os.path.join(dir_path_cache, index_filename)
+    with stage(profile, "index"):
+        previous_index = ContentIndex.load(index_path)
+
+    manifest = None
+    if args.incremental:
+        print("Loading build manifest...")
+        with stage(profile, "manifest"):
+            manifest = Manifest.load(dir_path_public)
+    else:
+        print("Deleting public directory...")
+        with stage(profile, "clean"):
+            if os.path.exists(dir_path_public):
+                shutil.rmtree(dir_path_public)
+
+    print("Indexing content...")
+    with stage(profile, "index"):
+        index = ContentIndex.build(dir_path_content, dir_path_public, previous_index)
+
+    # The copy log is held back until the pages are done, so the two sets of
+    # lines don't interleave
+    copy_log = []
 
+    def copy_static():
+        with stage(profile, "static"):
+            copy_files_recursive(
+                dir_path_static,
+                dir_path_public,
+                manifest,
+                args.copy_method,
+                args.checksum,
+                args.copy_threads,
+                copy_log.append,
+            )
+
+    # Static files are copied in the background while pages are generated;
+    # the two write disjoint outputs and the manifest only sees distinct keys
     print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
-    
-    # Change this line to use directory paths
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public)
+    with ThreadPoolExecutor(max_workers=1) as static_executor:
+        static_copy = static_executor.submit(copy_static)
+
+        # Change this line to use directory paths
+        with stage(profile, "pages"):
+            generate_pages_recursive(
+                dir_path_content,
+                template_path,
+                dir_path_public,
+                manifest,
+                args.jobs,
+                profile,
+                cache,
+                index,
+            )
+        static_copy.result()
+    for line in copy_log:
+        print(line)
+
+    with stage(profile, "index"):
+        index.save(index_path)
+
+    if manifest is not None:
+        with stage(profile, "manifest"):
+            manifest.remove_stale()
+            manifest.save()
+
+    if cache is not None and cache.hits + cache.misses:
+        print(f"Body cache: {cache.hits} hits, {cache.misses} misses")
+    inline_info = inline_cache_info()
+    if inline_info is not None and inline_info.hits + inline_info.misses:
+        print(f"Inline cache: {inline_info.hits} hits, {inline_info.misses} misses")
+
+    if profile is not None:
+        profile.print_summary()
+        if args.trace:
+            profile.write_trace(args.trace)
+            print(f"Wrote trace to {args.trace}")
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+
+manifest_filename = ".manifest.json"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_fingerprint(path):
+    # Size and modification time: a single stat call, the same check rsync uses.
+    # Also accepts an os.DirEntry, which caches its stat result.
+    stat = path.stat() if isinstance(path, os.DirEntry) else os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def hash_strings(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class Manifest:
+    # Keeps track of which inputs produced which outputs so a build can skip
+    # anything whose inputs hash the same as last time.
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.seen = set()
+
+    @classmethod
+    def load(cls, dest_dir_path):
+        path = os.path.join(dest_dir_path, manifest_filename)
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            # A broken manifest just means a full rebuild
+            return cls(path)
+        return cls(path, entries)
+
+    def is_fresh(self, src_path, dest_path, digest):
+        self.seen.add(src_path)
+        entry = self.entries.get(src_path)
+        if entry is None:
+            return False
+        if entry["hash"] != digest or entry["dest"] != dest_path:
+            return False
+        return os.path.exists(dest_path)
+
+    def record(self, src_path, dest_path, digest):
+        self.seen.add(src_path)
+        self.entries[src_path] = {"hash": digest, "dest": dest_path}
+
+    def remove_stale(self):
+        # Delete outputs whose source was not visited during this build
+        for src_path in list(self.entries):
+            if src_path in self.seen:
+                continue
+            dest_path = self.entries.pop(src_path)["dest"]
+            if os.path.isfile(dest_path):
+                print(f" - {dest_path}")
+                os.remove(dest_path)
+                remove_empty_dirs(os.path.dirname(dest_path), os.path.dirname(self.path))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+
+
+def remove_empty_dirs(dir_path, stop_dir_path):
+    stop_dir_path = os.path.abspath(stop_dir_path)
+    while os.path.abspath(dir_path) != stop_dir_path and os.path.isdir(dir_path):
+        if os.listdir(dir_path):
+            break
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
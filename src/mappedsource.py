@@ -0,0 +1,69 @@
+import mmap
+import os
+
+from markdown_blocks import iter_blocks
+
+
+class MappedSource:
+    # A markdown file read through mmap. Block boundaries are found on the raw
+    # bytes and only the slices that get parsed are decoded, so nothing is
+    # copied up front and parallel workers share the OS page cache.
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.file = open(path, "rb")
+        self.map = None
+        if os.fstat(self.file.fileno()).st_size > 0:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Text mode would turn \r\n and \r into \n, which the byte scan can't
+        # do in place, so files with \r take the regular text path instead
+        self.has_carriage_returns = self.map is not None and self.map.find(b"\r") != -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def lines(self):
+        if self.has_carriage_returns:
+            with open(self.path, "r", encoding=self.encoding) as f:
+                yield from f
+            return
+        if self.map is None:
+            return
+        start = 0
+        end = len(self.map)
+        while start < end:
+            newline = self.map.find(b"\n", start)
+            if newline == -1:
+                newline = end
+            yield self.map[start:newline].decode(self.encoding)
+            start = newline + 1
+
+    def blocks(self):
+        # Same blocks as markdown_to_blocks on the decoded file. A "\n\n" byte
+        # pair can't sit inside a multi-byte UTF-8 character, so slicing on it
+        # is safe.
+        if self.has_carriage_returns:
+            with open(self.path, "r", encoding=self.encoding) as f:
+                yield from iter_blocks(f)
+            return
+        if self.map is None:
+            return
+        start = 0
+        while True:
+            boundary = self.map.find(b"\n\n", start)
+            end = boundary if boundary != -1 else len(self.map)
+            block = self.map[start:end].decode(self.encoding).strip()
+            if block:
+                yield block
+            if boundary == -1:
+                return
+            start = boundary + 2
@@ -1,4 +1,5 @@
-import re 
+import functools
+import re
 
 from htmlnode import ParentNode
 from inline_markdown import text_to_textnodes
@@ -24,23 +25,83 @@ def markdown_to_blocks(markdown):
             clean_blocks.append(stripped_block)  
     return clean_blocks
 
+def iter_blocks(file, chunk_size=1 << 16):
+    # Same blocks as markdown_to_blocks, pulled lazily from a file object so only
+    # the block being assembled (plus one chunk) is held in memory
+    parts = []
+    ends_with_newline = False
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        start = 0
+        if ends_with_newline and chunk[0] == "\n":
+            # the "\n\n" straddles two chunks
+            block = "".join(parts)[:-1].strip()
+            if block:
+                yield block
+            parts = []
+            start = 1
+        while True:
+            boundary = chunk.find("\n\n", start)
+            if boundary == -1:
+                break
+            parts.append(chunk[start:boundary])
+            block = "".join(parts).strip()
+            if block:
+                yield block
+            parts = []
+            start = boundary + 2
+        rest = chunk[start:]
+        if rest:
+            parts.append(rest)
+        ends_with_newline = rest.endswith("\n")
+    block = "".join(parts).strip()
+    if block:
+        yield block
+
+# compiled once; each is matched at the start of the block only
+heading_pattern = re.compile(r"#{1,6} .")
+quote_pattern = re.compile(r"> ")
+ulist_pattern = re.compile(r"[*-] ")
+olist_pattern = re.compile(r"\d+\. ")
+code_info_pattern = re.compile(r"[\w\s]*")
+
+# the first character of a block picks the only pattern worth trying
+block_classifiers = {
+    "#": (heading_pattern, block_type_heading),
+    ">": (quote_pattern, block_type_quote),
+    "*": (ulist_pattern, block_type_ulist),
+    "-": (ulist_pattern, block_type_ulist),
+}
+for digit in "0123456789":
+    block_classifiers[digit] = (olist_pattern, block_type_olist)
+
 def block_to_block_type(block):
-    # DOTALL allows matching newlines inside the code block
-    if re.match(r"^```[\w\s]*\n.*\n```$", block.strip(), re.DOTALL): 
-        return "code"
-    for line in block.splitlines():
-        if re.match(r"^#{1,6} .+$", line):
-            return "heading"
-        if re.match(r"^> .*$", line):
-            return "quote"
-        if re.match(r"^[*-] .*$", line):
-            return "unordered_list"
-        if re.match(r"^\d+\. .*$", line):
-            return "ordered_list"
-    return "paragraph"
+    stripped = block.strip()
+    if stripped.startswith("```") and is_code_block(stripped):
+        return block_type_code
+    if not block:
+        return block_type_paragraph
+    classifier = block_classifiers.get(block[0])
+    if classifier is not None and classifier[0].match(block):
+        return classifier[1]
+    return block_type_paragraph
+
+def is_code_block(block):
+    # ``` plus an optional info string on the first line, then a closing ``` on its own line
+    if not block.endswith("\n```"):
+        return False
+    newline = block.find("\n", 3)
+    if newline > len(block) - 5:
+        return False
+    return code_info_pattern.fullmatch(block, 3, newline) is not None
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+    return blocks_to_html_node(markdown_to_blocks(markdown))
+
+
+def blocks_to_html_node(blocks):
     children = []
     for block in blocks:
         html_node = block_to_html_node(block)
@@ -50,22 +111,51 @@ def markdown_to_html_node(markdown):
 
 def block_to_html_node(block):
     block_type = block_to_block_type(block)
-    if block_type == block_type_paragraph:
-        return paragraph_to_html_node(block)
-    if block_type == block_type_heading:
-        return heading_to_html_node(block)
-    if block_type == block_type_code:
-        return code_to_html_node(block)
-    if block_type == block_type_olist:
-        return olist_to_html_node(block)
-    if block_type == block_type_ulist:
-        return ulist_to_html_node(block)
-    if block_type == block_type_quote:
-        return quote_to_html_node(block)
-    raise ValueError("Invalid block type")
+    converter = block_converters.get(block_type)
+    if converter is None:
+        raise ValueError("Invalid block type")
+    return converter(block)
+
+
+# Optional memo of inline text -> child nodes, for sites that repeat the same
+# nav lists, footers and notes on every page. Off until set_inline_cache_size.
+inline_cache = None
+# Hits and misses counted by worker processes, which each have their own memo
+worker_inline_hits = 0
+worker_inline_misses = 0
+
+def set_inline_cache_size(maxsize):
+    global inline_cache, worker_inline_hits, worker_inline_misses
+    if maxsize:
+        inline_cache = functools.lru_cache(maxsize=maxsize)(inline_to_html_nodes)
+    else:
+        inline_cache = None
+    worker_inline_hits = 0
+    worker_inline_misses = 0
+
+def add_worker_inline_counts(hits, misses):
+    global worker_inline_hits, worker_inline_misses
+    worker_inline_hits += hits
+    worker_inline_misses += misses
+
+def inline_cache_info():
+    # functools' (hits, misses, maxsize, currsize), or None when disabled.
+    # hits and misses include the counts added from worker processes.
+    if inline_cache is None:
+        return None
+    info = inline_cache.cache_info()
+    return info._replace(
+        hits=info.hits + worker_inline_hits, misses=info.misses + worker_inline_misses
+    )
+
+def inline_to_html_nodes(text):
+    # A tuple, so a memoized result can't be changed through one of its users
+    return tuple(text_node_to_html_node(text_node) for text_node in text_to_textnodes(text))
 
 
 def text_to_children(text):
+    if inline_cache is not None:
+        return list(inline_cache(text))
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
@@ -134,3 +224,13 @@ def quote_to_html_node(block):
     content = " ".join(new_lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
+
+
+block_converters = {
+    block_type_paragraph: paragraph_to_html_node,
+    block_type_heading: heading_to_html_node,
+    block_type_code: code_to_html_node,
+    block_type_olist: olist_to_html_node,
+    block_type_ulist: ulist_to_html_node,
+    block_type_quote: quote_to_html_node,
+}
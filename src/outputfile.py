@@ -0,0 +1,92 @@
+import locale
+import os
+import uuid
+
+# Pages are written in large chunks rather than one small write per node
+output_buffer_size = 1 << 20
+# What open() would use; spelled out so write_output can encode the same way
+output_encoding = locale.getpreferredencoding(False)
+
+
+class OutputFile:
+    # A page being written to a temp file next to its destination. Committing
+    # renames it into place, so readers never see a half-written page and a
+    # crashed build leaves the old one behind. When the new bytes match what is
+    # already there the old file is kept, along with its mtime; compare=False
+    # skips that check for callers that already know the page changed.
+    def __init__(self, dest_path, buffer_size=output_buffer_size, compare=True):
+        self.dest_path = dest_path
+        dir_path, filename = os.path.split(dest_path)
+        self.tmp_path = os.path.join(dir_path, f".{filename}.{uuid.uuid4().hex[:8]}.tmp")
+        # os.open with 0o666 gives the page the same umask-based mode open() would
+        fd = os.open(self.tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        self.file = os.fdopen(fd, "w", buffering=buffer_size, encoding=output_encoding)
+        self.write = self.file.write
+        self.compare = compare
+        self.changed = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def commit(self):
+        self.file.close()
+        if self.compare and same_contents(self.tmp_path, self.dest_path):
+            os.remove(self.tmp_path)
+            self.changed = False
+        else:
+            os.replace(self.tmp_path, self.dest_path)
+            self.changed = True
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+
+def write_output(dest_path, text):
+    # For a page that is already in memory: compare it with the file on disk
+    # first, so an unchanged page costs one read and no temp file. Streamed
+    # pages use OutputFile directly. Returns whether the file changed.
+    if file_contains(dest_path, encode_output(text)):
+        return False
+    with OutputFile(dest_path, compare=False) as to_file:
+        to_file.write(text)
+    return True
+
+
+def encode_output(text):
+    # The bytes OutputFile writes for text, newline translation included
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode(output_encoding)
+
+
+def file_contains(path, data):
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def same_contents(path, other_path, chunk_size=1 << 16):
+    try:
+        other_size = os.path.getsize(other_path)
+    except OSError:
+        return False
+    if os.path.getsize(path) != other_size:
+        return False
+    with open(path, "rb") as f, open(other_path, "rb") as other:
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk != other.read(chunk_size):
+                return False
+            if not chunk:
+                return True
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from manifest import hash_file, hash_strings
+
+# Every module whose code shapes a cached entry: the body html and the title
+parser_modules = ("directrender", "generatepage", "htmlnode", "inline_markdown", "markdown_blocks", "textnode")
+# ...plus the code that turns a body into the written page: template
+# substitution, block splitting for streamed files and the output writer
+generator_modules = parser_modules + ("mappedsource", "outputfile", "template")
+
+
+def modules_version(names):
+    # The files are hashed by path, so generatepage can use this module too
+    src_dir_path = os.path.dirname(os.path.abspath(__file__))
+    return hash_strings(
+        *(hash_file(os.path.join(src_dir_path, name + ".py")) for name in names)
+    )
+
+
+def compute_parser_version():
+    # Any edit to the parsing or rendering code invalidates every cached body
+    return modules_version(parser_modules)
+
+
+parser_version = compute_parser_version()
+# Part of every page's manifest digest, so --incremental rebuilds pages after
+# any of the modules that produce them change
+generator_version = modules_version(generator_modules)
+
+
+class BodyCache:
+    # Rendered page bodies on disk, keyed by the markdown source and the parser
+    # version. A template-only change can then re-wrap cached bodies instead
+    # of parsing every page again.
+    def __init__(self, cache_dir_path):
+        self.cache_dir_path = cache_dir_path
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown):
+        return hash_strings(parser_version, markdown)
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir_path, key[:2], key + ".json")
+
+    def get(self, key):
+        # Returns (title, body html), or None on a miss
+        try:
+            with open(self.entry_path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["title"], entry["body"]
+
+    def put(self, key, title, body):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so parallel workers never see half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"title": title, "body": body}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class MemoryBodyCache:
+    # The same interface kept in memory, for long-lived processes that render
+    # the same markdown repeatedly. Holds at most maxsize bodies, dropping the
+    # least recently used.
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown):
+        return hash_strings(parser_version, markdown)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, title, body):
+        self.entries[key] = (title, body)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
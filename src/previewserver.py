@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from generatepage import page_body
+from template import Template
+
+# Larger request bodies are refused rather than parsed
+max_body_size = 16 * 1024 * 1024
+
+
+class PreviewServer:
+    # Renders markdown POSTed to /preview into a full page with the site
+    # template. Parsing runs in a process pool so one editor's big page doesn't
+    # stall the others; rendered pages are kept in a bounded LRU keyed by the
+    # markdown's hash, and identical requests in flight share one render.
+    def __init__(self, template, jobs=1, cache_size=256):
+        if isinstance(template, str):
+            template = Template(template)
+        self.template = template
+        self.jobs = jobs
+        self.cache_size = cache_size
+        self.pages = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.executor = None
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=init_worker, initargs=(self.template,)
+        )
+        # Start the workers before accepting connections. Forked mid-request,
+        # they would inherit the client's socket and keep it from closing.
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, render_in_worker, "# Ready")
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def render(self, markdown):
+        key = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+        page = self.pages.get(key)
+        if page is not None:
+            self.pages.move_to_end(key)
+            self.hits += 1
+            return page
+        self.misses += 1
+        future = self.pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, render_in_worker, markdown)
+            self.pending[key] = future
+            future.add_done_callback(lambda done: self.finish(key, done))
+        # Shielded, so a client hanging up doesn't cancel a render others wait on
+        return await asyncio.shield(future)
+
+    def finish(self, key, future):
+        del self.pending[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.pages[key] = future.result()
+        if len(self.pages) > self.cache_size:
+            self.pages.popitem(last=False)
+
+    async def handle(self, reader, writer):
+        try:
+            status, content_type, body = await self.respond(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def respond(self, reader):
+        # Returns (status, content type, body bytes) for one request
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if len(request_line) != 3:
+            return error_response(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        method, path, _ = request_line
+        if path != "/preview":
+            return error_response(HTTPStatus.NOT_FOUND, "POST markdown to /preview")
+        if method != "POST":
+            return error_response(HTTPStatus.METHOD_NOT_ALLOWED, "POST markdown to /preview")
+        try:
+            length = int(headers.get("content-length", ""))
+        except ValueError:
+            return error_response(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required")
+        if length < 0 or length > max_body_size:
+            return error_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Markdown is too large")
+
+        try:
+            markdown = (await reader.readexactly(length)).decode("utf-8")
+        except UnicodeDecodeError:
+            return error_response(HTTPStatus.BAD_REQUEST, "Markdown must be UTF-8")
+        try:
+            page = await self.render(markdown)
+        except Exception as e:
+            # e.g. no title yet while the page is being written
+            return error_response(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+        return HTTPStatus.OK, "text/html; charset=utf-8", page.encode("utf-8")
+
+
+def error_response(status, message):
+    return status, "text/plain; charset=utf-8", (message + "\n").encode("utf-8")
+
+
+worker_template = None
+
+
+def init_worker(template):
+    global worker_template
+    worker_template = template
+
+
+def render_in_worker(markdown):
+    title, body = page_body(markdown)
+    return worker_template.render({"Title": title, "Content": body})
+
+
+async def serve_preview(template_path, port, jobs=1):
+    server = PreviewServer(Template.load(template_path), jobs)
+    port = await server.start("", port)
+    print(f"Preview server at http://localhost:{port}/preview (POST markdown, Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
@@ -0,0 +1,109 @@
+import contextlib
+import json
+import os
+import time
+
+
+class StageTimer:
+    # Accumulates wall and CPU time per named stage, and keeps each timed span
+    # so it can be exported as a trace. Plain attributes only, so worker
+    # processes can send their timings back to the parent.
+    def __init__(self):
+        self.stages = {}
+        self.events = []
+        self.pid = os.getpid()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall_start = time.perf_counter()
+        # Per-thread CPU, so static copies running on other threads don't
+        # get billed to the page or stage being timed
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            total_wall, total_cpu = self.stages.get(name, (0.0, 0.0))
+            self.stages[name] = (total_wall + wall, total_cpu + cpu)
+            self.events.append((name, wall_start, wall))
+
+    def wall(self):
+        return sum(wall for wall, _ in self.stages.values())
+
+
+class PageProfile(StageTimer):
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+
+class BuildProfile(StageTimer):
+    def __init__(self):
+        super().__init__()
+        self.pages = []
+        self.start = time.perf_counter()
+
+    def add_page(self, page_profile):
+        self.pages.append(page_profile)
+
+    def stage_totals(self):
+        totals = {}
+        for page in self.pages:
+            for name, (wall, cpu) in page.stages.items():
+                total_wall, total_cpu = totals.get(name, (0.0, 0.0))
+                totals[name] = (total_wall + wall, total_cpu + cpu)
+        return totals
+
+    def print_summary(self, top=10):
+        print("Build stages:")
+        for name, (wall, cpu) in self.stages.items():
+            print(f"  {name:<12} wall {wall * 1000:10.2f} ms  cpu {cpu * 1000:10.2f} ms")
+
+        totals = self.stage_totals()
+        page_wall = sum(wall for wall, _ in totals.values()) or 1.0
+        print(f"Page stages ({len(self.pages)} pages):")
+        for name in sorted(totals, key=lambda name: totals[name][0], reverse=True):
+            wall, cpu = totals[name]
+            print(
+                f"  {name:<12} wall {wall * 1000:10.2f} ms  cpu {cpu * 1000:10.2f} ms"
+                f"  {wall / page_wall:6.1%}"
+            )
+
+        print("Slowest pages:")
+        for page in sorted(self.pages, key=PageProfile.wall, reverse=True)[:top]:
+            slowest_stage = max(page.stages, key=lambda name: page.stages[name][0])
+            print(f"  {page.wall() * 1000:10.2f} ms  {page.path} (mostly {slowest_stage})")
+
+    def write_trace(self, trace_path):
+        # Chrome trace event format, which chrome://tracing, Perfetto and
+        # speedscope can all open
+        events = []
+        for name, start, wall in self.events:
+            events.append(trace_event(name, "build", start - self.start, wall, self.pid))
+        for page in self.pages:
+            for name, start, wall in page.events:
+                event = trace_event(name, "page", start - self.start, wall, page.pid)
+                event["args"] = {"page": page.path}
+                events.append(event)
+        with open(trace_path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def trace_event(name, category, start, duration, pid):
+    return {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start * 1e6,
+        "dur": duration * 1e6,
+        "pid": pid,
+        "tid": pid,
+    }
+
+
+def stage(profile, name):
+    # Lets callers time a stage without checking whether profiling is on
+    if profile is None:
+        return contextlib.nullcontext()
+    return profile.stage(name)
@@ -0,0 +1,36 @@
+import posixpath
+
+from generatepage import html_filename, page_body
+from pagecache import MemoryBodyCache
+from template import Template
+
+
+class Site:
+    # Renders pages entirely in memory, for callers that embed the generator
+    # (previews, tests) rather than building ./public. The template is split
+    # once and the body cache is kept across calls.
+    def __init__(self, template, cache=None):
+        if isinstance(template, str):
+            template = Template(template)
+        self.template = template
+        self.cache = cache if cache is not None else MemoryBodyCache()
+
+    @classmethod
+    def load(cls, template_path, cache=None):
+        return cls(Template.load(template_path), cache)
+
+    def render(self, markdown):
+        # One markdown document to a complete HTML page
+        title, body = page_body(markdown, cache=self.cache)
+        return self.template.render({"Title": title, "Content": body})
+
+    def build(self, files):
+        # files maps content-relative paths ("blog/post.md") to markdown, like
+        # a virtual content directory. Returns output paths mapped to HTML.
+        pages = {}
+        for path, markdown in files.items():
+            directory, filename = posixpath.split(path)
+            if not filename.endswith(".md"):
+                continue
+            pages[posixpath.join(directory, html_filename(filename))] = self.render(markdown)
+        return pages
@@ -0,0 +1,42 @@
+import re
+
+template_placeholders = ("Title", "Content")
+
+
+class Template:
+    # A template pre-split into literal segments and placeholder slots, so
+    # rendering a page is a series of writes instead of whole-document replaces.
+    def __init__(self, text, placeholders=template_placeholders):
+        pattern = re.compile(
+            r"\{\{ (" + "|".join(re.escape(name) for name in placeholders) + r") \}\}"
+        )
+        self.segments = []
+        self.slots = []
+        position = 0
+        for match in pattern.finditer(text):
+            self.segments.append(text[position : match.start()])
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.segments.append(text[position:])
+
+    @classmethod
+    def load(cls, template_path):
+        with open(template_path, "r") as f:
+            return cls(f.read())
+
+    def render_to(self, write, values):
+        # Values are strings or anything with render_to (like an HTMLNode),
+        # which is streamed into the output instead of being joined first
+        for segment, slot in zip(self.segments, self.slots):
+            write(segment)
+            value = values[slot]
+            if isinstance(value, str):
+                write(value)
+            else:
+                value.render_to(write)
+        write(self.segments[-1])
+
+    def render(self, values):
+        chunks = []
+        self.render_to(chunks.append, values)
+        return "".join(chunks)
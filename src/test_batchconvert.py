@@ -0,0 +1,28 @@
+import unittest
+
+from batchconvert import iter_chunks, markdown_to_html_batch
+from corpus import make_snippet
+from markdown_blocks import markdown_to_html_node
+
+
+class TestBatchConvert(unittest.TestCase):
+    def setUp(self):
+        self.snippets = [make_snippet(i) for i in range(50)] + ["", "# Heading only"]
+        self.expected = [markdown_to_html_node(s).to_html() for s in self.snippets]
+
+    def test_serial(self):
+        self.assertEqual(list(markdown_to_html_batch(self.snippets, chunk_size=7)), self.expected)
+
+    def test_parallel_keeps_order(self):
+        results = markdown_to_html_batch(iter(self.snippets), jobs=2, chunk_size=5)
+        self.assertEqual(list(results), self.expected)
+
+    def test_empty(self):
+        self.assertEqual(list(markdown_to_html_batch([], jobs=2)), [])
+
+    def test_iter_chunks(self):
+        self.assertEqual(list(iter_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+
+if __name__ == "__main__":
+    unittest.main()
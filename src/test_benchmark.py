@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+
+from benchmark import flatten, write_site
+from corpus import corpus_shapes
+from generatepage import collect_pages
+from markdown_blocks import markdown_to_html_node
+
+
+class TestBenchmarkCorpus(unittest.TestCase):
+    def test_shapes_parse(self):
+        for shape, make in corpus_shapes.items():
+            html = markdown_to_html_node(make(200)).to_html()
+            self.assertTrue(html.startswith("<div><h1>"), shape)
+
+    def test_write_site_depth(self):
+        with tempfile.TemporaryDirectory() as root:
+            content_dir, template_path = write_site(root, 7, 3, size=100)
+            pages = collect_pages(content_dir, "public")
+            self.assertEqual(len(pages), 7)
+            self.assertTrue(os.path.isdir(os.path.join(content_dir, "level0", "level1", "level2")))
+            self.assertTrue(os.path.exists(template_path))
+
+    def test_flatten(self):
+        self.assertEqual(
+            flatten({"build": {"pages": 3, "time": 0.5}, "name": "skipped"}),
+            {"build.pages": 3, "build.time": 0.5},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+
+import generatepage
+from contentindex import ContentIndex
+from generatepage import generate_pages_recursive
+from manifest import Manifest, hash_file
+
+
+class TestContentIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\nSee [the post](/blog/post) and ![a cat](/cat.png)",
+        )
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n" + "words " * 200)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_build(self):
+        index = ContentIndex.build(self.content, self.public)
+        self.assertEqual(
+            [(record.src_path, record.dest_path) for record in index.pages],
+            [
+                (os.path.join(self.content, "blog", "post.md"),
+                 os.path.join(self.public, "blog", "post.html")),
+                (os.path.join(self.content, "index.md"),
+                 os.path.join(self.public, "index.html")),
+            ],
+        )
+        for record in index.pages:
+            self.assertEqual(record.size, os.path.getsize(record.src_path))
+            self.assertIsNone(record.digest)
+            self.assertIsNone(record.title)
+
+    def test_by_size(self):
+        index = ContentIndex.build(self.content, self.public)
+        self.assertEqual(
+            [os.path.basename(record.src_path) for record in index.by_size()],
+            ["post.md", "index.md"],
+        )
+
+    def test_render_fills_titles_and_links(self):
+        index = ContentIndex.build(self.content, self.public)
+        generate_pages_recursive(self.content, self.template, self.public, index=index)
+        home = index.get(os.path.join(self.content, "index.md"))
+        self.assertEqual(home.title, "Home")
+        # images are not links
+        self.assertEqual(home.links, ["/blog/post"])
+        self.assertEqual(index.get(os.path.join(self.content, "blog", "post.md")).links, [])
+        self.assertEqual([record.title for record in index.backlinks("/blog/post")], ["Home"])
+
+    def test_streamed_pages_fill_titles_and_links(self):
+        index = ContentIndex.build(self.content, self.public)
+        original = generatepage.stream_threshold
+        try:
+            generatepage.stream_threshold = 0
+            generate_pages_recursive(self.content, self.template, self.public, index=index)
+        finally:
+            generatepage.stream_threshold = original
+        home = index.get(os.path.join(self.content, "index.md"))
+        self.assertEqual((home.title, home.links), ("Home", ["/blog/post"]))
+
+    def test_round_trip_keeps_unchanged_digests(self):
+        index_path = os.path.join(self.public, "index.json")
+        index = ContentIndex.build(self.content, self.public)
+        generate_pages_recursive(
+            self.content, self.template, self.public, Manifest.load(self.public), index=index
+        )
+        index.save(index_path)
+        post_path = os.path.join(self.content, "blog", "post.md")
+        home_path = os.path.join(self.content, "index.md")
+        self.write(post_path, "# Edited post")
+
+        previous = ContentIndex.load(index_path)
+        index = ContentIndex.build(self.content, self.public, previous)
+        digests = {record.src_path: record.digest for record in index.pages}
+        self.assertIsNone(digests[post_path])
+        self.assertEqual(digests[home_path], hash_file(home_path))
+        self.assertIsNone(index.get(post_path).title)
+        self.assertEqual(index.get(home_path).title, "Home")
+
+    def test_load_missing_or_corrupt(self):
+        index_path = os.path.join(self.tmp.name, "index.json")
+        self.assertIsNone(ContentIndex.load(index_path))
+        self.write(index_path, "{not json")
+        self.assertIsNone(ContentIndex.load(index_path))
+
+    def test_generate_from_index(self):
+        index = ContentIndex.build(self.content, self.public)
+        manifest = Manifest.load(self.public)
+        generate_pages_recursive(
+            self.content, self.template, self.public, manifest, jobs=2, index=index
+        )
+        with open(os.path.join(self.public, "blog", "post.html")) as f:
+            self.assertTrue(f.read().startswith("<title>Post</title>"))
+        self.assertEqual([record.title for record in index.pages], ["Post", "Home"])
+        # the index hashes match what the manifest would compute itself
+        other_public = os.path.join(self.tmp.name, "other")
+        other = Manifest.load(other_public)
+        generate_pages_recursive(self.content, self.template, other_public, other)
+        self.assertEqual(
+            sorted(entry["hash"] for entry in manifest.entries.values()),
+            sorted(entry["hash"] for entry in other.entries.values()),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import random
+import unittest
+
+from corpus import corpus_shapes, make_page
+from directrender import DirectDocument, markdown_to_html
+from markdown_blocks import (
+    iter_blocks,
+    markdown_to_html_node,
+    set_inline_cache_size,
+)
+
+
+class TestDirectRender(unittest.TestCase):
+    fragments = [
+        "plain", " ", "words", "\n", "\n\n", "# ", "## ", "> ", "- ", "* ", "1. ",
+        "```\n", "\n```", "**", "*", "`", "[link](https://boot.dev)", "![img](/a.png)",
+        "**bold**", "*it*", "`code`", "[a]", "(b)", ">",
+    ]
+
+    def assertSameAsTree(self, markdown):
+        try:
+            expected = markdown_to_html_node(markdown).to_html()
+        except ValueError as e:
+            with self.assertRaises(ValueError, msg=repr(markdown)) as raised:
+                markdown_to_html(markdown)
+            self.assertEqual(str(raised.exception), str(e))
+            return
+        self.assertEqual(markdown_to_html(markdown), expected, msg=repr(markdown))
+
+    def test_block_types(self):
+        self.assertEqual(
+            markdown_to_html(
+                "# Title\n\nsome **bold** and [a link](/x)\n\n> quoted *text*\n\n"
+                "- one\n- two\n\n1. first\n2. `second`\n\n```\ncode\n```"
+            ),
+            "<div><h1>Title</h1><p>some <b>bold</b> and <a href=\"/x\">a link</a></p>"
+            "<blockquote>quoted <i>text</i></blockquote><ul><li>one</li><li>two</li></ul>"
+            "<ol><li>first</li><li><code>second</code></li></ol>"
+            "<pre><code>code\n</code></pre></div>",
+        )
+
+    def test_escaped_attributes(self):
+        self.assertSameAsTree('# T\n\n[q](/s?a=1&b="2") and ![it\'s <here>](/i.png?x&y)')
+
+    def test_corpus_shapes(self):
+        for make in corpus_shapes.values():
+            self.assertSameAsTree(make(300))
+        self.assertSameAsTree(make_page(3))
+
+    def test_random_documents(self):
+        rng = random.Random(2024)
+        for _ in range(3000):
+            markdown = "".join(rng.choice(self.fragments) for _ in range(rng.randint(0, 16)))
+            self.assertSameAsTree(markdown)
+
+    def test_with_inline_cache(self):
+        markdown = corpus_shapes["mixed"](300)
+        set_inline_cache_size(64)
+        try:
+            self.assertSameAsTree(markdown)
+            self.assertSameAsTree(markdown)
+        finally:
+            set_inline_cache_size(0)
+
+    def test_document_streams_blocks(self):
+        markdown = "# Title\n\nsome **bold** text\n\n* a\n* b"
+        chunks = []
+        DirectDocument(iter_blocks(io.StringIO(markdown))).render_to(chunks.append)
+        self.assertEqual("".join(chunks), markdown_to_html_node(markdown).to_html())
+        self.assertEqual(DirectDocument([]).to_html(), "<div></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import tempfile
+import unittest
+
+import generatepage
+from manifest import Manifest
+from markdown_blocks import inline_cache_info, set_inline_cache_size
+from generatepage import collect_pages, generate_pages_recursive, extract_title, title_from_lines
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog", "deep"))
+        self.write(self.template, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome **here**")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n* one\n* two")
+        self.write(os.path.join(self.content, "blog", "deep", "index.md"), "# Deep\n\n> quoted")
+        self.write(os.path.join(self.content, "blog", "notes.txt"), "not markdown")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read_tree(self, root):
+        result = {}
+        for dir_path, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path) as f:
+                    result[os.path.relpath(path, root)] = f.read()
+        return result
+
+    def test_collect_pages(self):
+        pages = collect_pages(self.content, "public")
+        self.assertEqual(
+            pages,
+            [
+                (os.path.join(self.content, "blog", "deep", "index.md"),
+                 os.path.join("public", "blog", "deep", "index.html")),
+                (os.path.join(self.content, "blog", "post.md"),
+                 os.path.join("public", "blog", "post.html")),
+                (os.path.join(self.content, "index.md"),
+                 os.path.join("public", "index.html")),
+            ],
+        )
+
+    def test_generate_pages(self):
+        public = os.path.join(self.tmp.name, "public")
+        generate_pages_recursive(self.content, self.template, public)
+        self.assertEqual(
+            self.read_tree(public)["index.html"],
+            "<title>Home</title><main><div><h1>Home</h1><p>Welcome <b>here</b></p></div></main>",
+        )
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial)
+        generate_pages_recursive(self.content, self.template, parallel, jobs=2)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+        self.assertEqual(len(self.read_tree(parallel)), 3)
+
+    def test_parallel_counts_inline_memo(self):
+        lookups = []
+        for jobs in (1, 2):
+            set_inline_cache_size(64)
+            try:
+                public = os.path.join(self.tmp.name, f"public{jobs}")
+                generate_pages_recursive(self.content, self.template, public, jobs=jobs)
+                info = inline_cache_info()
+            finally:
+                set_inline_cache_size(0)
+            lookups.append(info.hits + info.misses)
+        # the workers' lookups are added to the parent's counts
+        self.assertEqual(lookups, [7, 7])
+
+    def test_streaming_matches_buffered(self):
+        buffered = os.path.join(self.tmp.name, "buffered")
+        streamed = os.path.join(self.tmp.name, "streamed")
+        generate_pages_recursive(self.content, self.template, buffered)
+        original = generatepage.stream_threshold
+        generatepage.stream_threshold = 0
+        try:
+            generate_pages_recursive(self.content, self.template, streamed)
+        finally:
+            generatepage.stream_threshold = original
+        self.assertEqual(self.read_tree(buffered), self.read_tree(streamed))
+
+    def build_incremental(self, public):
+        manifest = Manifest.load(public)
+        generate_pages_recursive(self.content, self.template, public, manifest)
+        manifest.save()
+
+    def test_generator_change_rebuilds_pages(self):
+        public = os.path.join(self.tmp.name, "public")
+        self.build_incremental(public)
+        self.write(os.path.join(public, "index.html"), "stale")
+        self.build_incremental(public)
+        self.assertEqual(self.read_tree(public)["index.html"], "stale")
+
+        original = generatepage.generator_version
+        try:
+            generatepage.generator_version = "newer generator"
+            self.build_incremental(public)
+        finally:
+            generatepage.generator_version = original
+        self.assertTrue(self.read_tree(public)["index.html"].startswith("<title>Home</title>"))
+
+    def test_parallel_propagates_errors(self):
+        self.write(os.path.join(self.content, "blog", "untitled.md"), "no title here")
+        public = os.path.join(self.tmp.name, "public")
+        with self.assertRaises(Exception):
+            generate_pages_recursive(self.content, self.template, public, jobs=2)
+
+
+class TestExtractTitle(unittest.TestCase):
+    def test_title(self):
+        self.assertEqual(extract_title("# Hello"), "Hello")
+
+    def test_title_after_text(self):
+        self.assertEqual(extract_title("intro\n\n## Sub\n\n# Main title  "), "Main title")
+
+    def test_title_keeps_inner_hashes(self):
+        self.assertEqual(extract_title("# C# and F# tips"), "C# and F# tips")
+
+    def test_title_closing_hashes(self):
+        self.assertEqual(extract_title("# Closed ##\n\ntext"), "Closed")
+        self.assertEqual(extract_title("# Issue #42"), "Issue #42")
+
+    def test_title_skips_subheadings(self):
+        self.assertEqual(extract_title("## Sub\n### Deeper\n#Tight\n# Later"), "Tight")
+
+    def test_title_crlf(self):
+        self.assertEqual(extract_title("intro\r\n# Windows\r\n"), "Windows")
+
+    def test_title_from_lines_matches(self):
+        markdown = "text\n## Sub\n# The C# title #\nmore"
+        self.assertEqual(
+            title_from_lines(line + "\n" for line in markdown.split("\n")),
+            extract_title(markdown),
+        )
+
+    def test_no_title(self):
+        with self.assertRaises(Exception):
+            extract_title("## only a subheading")
+
+
+if __name__ == "__main__":
+    unittest.main()
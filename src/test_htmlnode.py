@@ -14,6 +14,23 @@ class TestHTMLNode(unittest.TestCase):
             ' class="greeting" href="https://boot.dev"',
         )
 
+    def test_props_are_escaped(self):
+        node = LeafNode("a", "search", {"href": '/find?q="a"&b=<c>', "title": "it's"})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/find?q=&quot;a&quot;&amp;b=&lt;c&gt;" title="it&#x27;s">search</a>',
+        )
+
+    def test_non_string_props(self):
+        node = LeafNode("img", "", {"width": 100})
+        self.assertEqual(node.to_html(), '<img width="100"></img>')
+
+    def test_props_html_is_reused(self):
+        node = LeafNode("a", "home", {"href": "/"})
+        first = node.props_to_html()
+        self.assertIs(node.props_to_html(), first)
+        self.assertEqual(LeafNode("br", "").props_to_html(), "")
+
     def test_values(self):
         node = HTMLNode(
             "div",
@@ -188,6 +205,36 @@ class TestHTMLNode(unittest.TestCase):
             node.to_html(),
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
+    def test_parent_without_tag(self):
+        node = ParentNode(None, [LeafNode("b", "Bold text")])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_parent_without_children(self):
+        node = ParentNode("p", None)
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_render_to_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold text"), LeafNode(None, "Normal text")]),
+                LeafNode("a", "link", {"href": "https://boot.dev"}),
+            ],
+        )
+        chunks = []
+        node.render_to(chunks.append)
+        self.assertEqual("".join(chunks), node.to_html())
+        self.assertGreater(len(chunks), 1)
+
+    def test_very_deep_tree_does_not_recurse(self):
+        node = LeafNode(None, "core")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(html.count("</span>"), 5000)
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,8 +5,10 @@ from inline_markdown import (
     extract_markdown_images,
     split_nodes_image,
     split_nodes_link,
-    text_to_textnodes
+    text_to_textnodes,
+    text_to_textnodes_multipass,
 )
+import random
 
 from textnode import TextNode, TextType
 
@@ -252,6 +254,29 @@ class TestInlineMarkdown(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_does_not_mutate_input(self):
+        text = "a [one](u1) b [two](u2) c"
+        node = TextNode(text, TextType.TEXT)
+        split_nodes_link([node])
+        split_nodes_image([node])
+        self.assertEqual(node, TextNode(text, TextType.TEXT))
+
+    def test_split_link_dense_text(self):
+        text = " ".join(f"[page {i}](/p/{i})" for i in range(5000))
+        nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(nodes), 9999)
+        self.assertEqual(nodes[-1], TextNode("page 4999", TextType.LINK, "/p/4999"))
+
+    def test_split_link_ignores_images(self):
+        node = TextNode("![img](a.png) and [link](b)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("![img](a.png) and ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "b"),
+            ],
+            split_nodes_link([node]),
+        )
+
 class TestTextToTextNodes(unittest.TestCase):
     def test_example_case(self):
         input_text = (
@@ -332,5 +357,48 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertEqual(text_to_textnodes(input_text), expected_output)
 
+class TestSinglePassEquivalence(unittest.TestCase):
+    fragments = [
+        "plain", " ", "words here", "**", "*", "`", "!", "[", "]", "(", ")",
+        "[link](https://boot.dev)", "![img](/a.png)", "**bold**", "*it*",
+        "`code`", "***", "[a]", "(b)", "!![x](y)",
+    ]
+
+    def assertSameAsMultipass(self, text):
+        try:
+            expected = text_to_textnodes_multipass(text)
+        except ValueError:
+            with self.assertRaises(ValueError, msg=text):
+                text_to_textnodes(text)
+            return
+        self.assertEqual(text_to_textnodes(text), expected, msg=text)
+
+    def test_existing_cases(self):
+        for text in [
+            "This is **text** with an *italic* word and a `code block` and an "
+            "![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+            "This is a simple text.",
+            "This is **bold** and **another bold**.",
+            "This is *italic* and *another italic*.",
+            "This is `code` and another `code block`.",
+            "Here is an image ![image](https://example.com/image.jpg) and a [link](https://example.com).",
+            "",
+            "**",
+            "a****b",
+            "**bold with [link](url)** and ![img](src)[next](to)",
+        ]:
+            self.assertSameAsMultipass(text)
+
+    def test_random_inputs(self):
+        rng = random.Random(1234)
+        for _ in range(3000):
+            text = "".join(rng.choice(self.fragments) for _ in range(rng.randint(0, 12)))
+            self.assertSameAsMultipass(text)
+
+    def test_does_not_mutate_shared_state(self):
+        text = "a [link](u) b ![img](v) c"
+        first = text_to_textnodes(text)
+        self.assertEqual(text_to_textnodes(text), first)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,165 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import copy_files_recursive
+from manifest import Manifest, hash_file
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self):
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest)
+        manifest.remove_stale()
+        manifest.save()
+        return manifest
+
+    def test_hash_file(self):
+        path = os.path.join(self.static, "index.css")
+        before = hash_file(path)
+        self.assertEqual(before, hash_file(path))
+        self.write(path, "body { color: red }")
+        self.assertNotEqual(before, hash_file(path))
+
+    def test_roundtrip(self):
+        manifest = self.build()
+        loaded = Manifest.load(self.public)
+        self.assertEqual(loaded.entries, manifest.entries)
+        self.assertEqual(len(loaded.entries), 2)
+
+    def test_unchanged_files_are_skipped(self):
+        self.build()
+        dest = os.path.join(self.public, "index.css")
+        self.write(dest, "tampered")
+        self.build()
+        # Source did not change, so the output is left alone
+        with open(dest) as f:
+            self.assertEqual(f.read(), "tampered")
+
+    def test_unchanged_build_logs_nothing(self):
+        self.build()
+        lines = []
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, log=lines.append)
+        self.assertEqual(lines, [])
+        self.write(os.path.join(self.static, "images", "a.png"), "new png")
+        copy_files_recursive(self.static, self.public, manifest, log=lines.append)
+        self.assertEqual(
+            lines,
+            [
+                f" * {os.path.join(self.static, 'images')} -> {os.path.join(self.public, 'images')}",
+                f" * {os.path.join(self.static, 'images', 'a.png')} -> "
+                f"{os.path.join(self.public, 'images', 'a.png')}",
+            ],
+        )
+
+    def test_changed_files_are_copied(self):
+        self.build()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.build()
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.css"))
+        self.build()
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.css")))
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        manifest = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a.png")))
+        self.assertEqual(len(manifest.entries), 1)
+
+    def test_hardlink_method(self):
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, "hardlink")
+        source = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(source.st_ino, dest.st_ino)
+
+    def test_copy_after_hardlink_build(self):
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, "hardlink")
+        manifest.save()
+        path = os.path.join(self.static, "index.css")
+        stat = os.stat(path)
+        # an in-place edit also changes the linked output
+        self.write(path, "body { color: red }")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, "copy")
+        dest = os.path.join(self.public, "index.css")
+        self.assertNotEqual(os.stat(dest).st_ino, os.stat(path).st_ino)
+        with open(dest) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+
+    def test_switching_method_replaces_assets(self):
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, "copy")
+        manifest.save()
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, "hardlink")
+        source = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(source.st_ino, dest.st_ino)
+
+    def test_reflink_method_falls_back_to_copy(self):
+        copy_files_recursive(self.static, self.public, None, "reflink")
+        with open(os.path.join(self.public, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    def test_checksum_ignores_touch(self):
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, checksum=True)
+        manifest.save()
+        path = os.path.join(self.static, "index.css")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+        manifest = Manifest.load(self.public)
+        with open(os.path.join(self.public, "index.css"), "w") as f:
+            f.write("tampered")
+        copy_files_recursive(self.static, self.public, manifest, checksum=True)
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "tampered")
+
+    def test_threaded_copy_matches_serial(self):
+        for i in range(20):
+            self.write(os.path.join(self.static, "images", f"{i}.txt"), str(i) * i)
+        manifest = Manifest.load(self.public)
+        copy_files_recursive(self.static, self.public, manifest, threads=4)
+        self.assertEqual(len(manifest.entries), 22)
+        for i in range(20):
+            with open(os.path.join(self.public, "images", f"{i}.txt")) as f:
+                self.assertEqual(f.read(), str(i) * i)
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            copy_files_recursive(self.static, self.public, None, "teleport")
+
+    def test_corrupt_manifest_means_full_build(self):
+        os.makedirs(self.public)
+        self.write(os.path.join(self.public, ".manifest.json"), "{not json")
+        manifest = Manifest.load(self.public)
+        self.assertEqual(manifest.entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
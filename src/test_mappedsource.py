@@ -0,0 +1,53 @@
+import os
+import random
+import tempfile
+import unittest
+
+from mappedsource import MappedSource
+from markdown_blocks import markdown_to_blocks
+
+
+class TestMappedSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.md")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def read_text(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_blocks_match_text_mode(self):
+        rng = random.Random(7)
+        pieces = ["word", " ", "\n", "\n\n", "\n\n\n", "Númenor", "é\n", "\r\n", "\r\n\r\n"]
+        for _ in range(300):
+            self.write("".join(rng.choice(pieces) for _ in range(rng.randint(0, 15))).encode("utf-8"))
+            with MappedSource(self.path) as source:
+                self.assertEqual(list(source.blocks()), markdown_to_blocks(self.read_text()))
+
+    def test_lines_match_text_mode(self):
+        self.write("# Title\n\nbody é\nlast".encode("utf-8"))
+        with MappedSource(self.path) as source:
+            self.assertEqual(list(source.lines()), ["# Title", "", "body é", "last"])
+
+    def test_empty_file(self):
+        self.write(b"")
+        with MappedSource(self.path) as source:
+            self.assertEqual(list(source.blocks()), [])
+            self.assertEqual(list(source.lines()), [])
+
+    def test_lines_stop_early(self):
+        self.write(b"# Title\n" + b"x" * 100000)
+        with MappedSource(self.path) as source:
+            lines = source.lines()
+            self.assertEqual(next(lines), "# Title")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,11 @@
+import io
+import random
 import unittest
 from markdown_blocks import (
+    iter_blocks,
+    inline_cache_info,
+    set_inline_cache_size,
+    text_to_children,
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
@@ -70,6 +76,32 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), block_type_paragraph)
 
+    def test_block_type_from_first_line(self):
+        block = "paragraph text\n# not a heading"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "####### too deep"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "#no space"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "- dash list\n- items"
+        self.assertEqual(block_to_block_type(block), block_type_ulist)
+        block = "12. twelve"
+        self.assertEqual(block_to_block_type(block), block_type_olist)
+        block = "1.not a list"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+
+    def test_code_block_types(self):
+        block = "```python\nprint('hi')\n```"
+        self.assertEqual(block_to_block_type(block), block_type_code)
+        block = "```\n\n```"
+        self.assertEqual(block_to_block_type(block), block_type_code)
+        block = "```\n```"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "```py-thon\ncode\n```"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "```\ncode```"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -153,6 +185,63 @@ this is paragraph text
             "<div><blockquote>This is a blockquote block</blockquote><p>this is paragraph text</p></div>",
         )
 
+    def test_code(self):
+        md = """
+```
+func main(){
+    fmt.Println("Hello, World!")
+}
+```
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code>func main(){\n    fmt.Println("Hello, World!")\n}\n</code></pre></div>',
+        )
+
+class TestStreamingBlocks(unittest.TestCase):
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        rng = random.Random(42)
+        pieces = ["text", " ", "\n", "\n\n", "\n\n\n", "# h", "- item\n"]
+        for _ in range(2000):
+            md = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 15)))
+            for chunk_size in (1, 2, 5, 1 << 16):
+                self.assertEqual(
+                    list(iter_blocks(io.StringIO(md), chunk_size)),
+                    markdown_to_blocks(md),
+                    msg=repr(md),
+                )
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        set_inline_cache_size(0)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(inline_cache_info())
+
+    def test_hits_and_output(self):
+        md = "# Page\n\n- [Home](/) and **nav**\n- [About](/about)"
+        expected = markdown_to_html_node(md).to_html()
+        set_inline_cache_size(16)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses), (3, 3))
+
+    def test_results_are_not_shared_lists(self):
+        set_inline_cache_size(16)
+        first = text_to_children("some *text*")
+        first.append("junk")
+        self.assertEqual(len(text_to_children("some *text*")), 2)
+
+    def test_bounded(self):
+        set_inline_cache_size(2)
+        for i in range(10):
+            text_to_children(f"fragment {i}")
+        self.assertEqual(inline_cache_info().currsize, 2)
 
 if __name__ == "__main__":
     unittest.main()
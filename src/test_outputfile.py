@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+import outputfile
+from outputfile import OutputFile, same_contents, write_output
+
+
+class TestOutputFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.dest) as f:
+            return f.read()
+
+    def test_write(self):
+        with OutputFile(self.dest) as out:
+            out.write("<p>")
+            out.write("hello</p>")
+        self.assertTrue(out.changed)
+        self.assertEqual(self.read(), "<p>hello</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_unchanged_keeps_mtime(self):
+        with OutputFile(self.dest) as out:
+            out.write("same")
+        os.utime(self.dest, ns=(1_000_000_000, 1_000_000_000))
+        with OutputFile(self.dest) as out:
+            out.write("same")
+        self.assertFalse(out.changed)
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_changed_replaces(self):
+        with OutputFile(self.dest) as out:
+            out.write("old")
+        with OutputFile(self.dest) as out:
+            out.write("new")
+        self.assertTrue(out.changed)
+        self.assertEqual(self.read(), "new")
+
+    def test_error_keeps_old_page(self):
+        with OutputFile(self.dest) as out:
+            out.write("old")
+        with self.assertRaises(ValueError):
+            with OutputFile(self.dest) as out:
+                out.write("half")
+                raise ValueError("render failed")
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_write_output(self):
+        self.assertTrue(write_output(self.dest, "<p>new</p>\n"))
+        self.assertEqual(self.read(), "<p>new</p>\n")
+        self.assertTrue(write_output(self.dest, "<p>newer</p>\n"))
+        self.assertEqual(self.read(), "<p>newer</p>\n")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_write_output_unchanged_opens_no_temp_file(self):
+        write_output(self.dest, "same")
+        os.utime(self.dest, ns=(1_000_000_000, 1_000_000_000))
+        original = outputfile.OutputFile
+        try:
+            outputfile.OutputFile = None
+            self.assertFalse(write_output(self.dest, "same"))
+        finally:
+            outputfile.OutputFile = original
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 1_000_000_000)
+
+    def test_same_contents(self):
+        other = os.path.join(self.tmp.name, "other.html")
+        missing = os.path.join(self.tmp.name, "missing.html")
+        for path, text in ((self.dest, "abc"), (other, "abd")):
+            with open(path, "w") as f:
+                f.write(text)
+        self.assertTrue(same_contents(self.dest, self.dest))
+        self.assertFalse(same_contents(self.dest, other))
+        self.assertFalse(same_contents(self.dest, missing))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import pagecache
+from generatepage import generate_pages_recursive
+from pagecache import BodyCache
+
+
+class TestBodyCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BodyCache(os.path.join(self.tmp.name, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        key = self.cache.key("# Title")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "Title", "<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get(key), ("Title", "<div><h1>Title</h1></div>"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_parser_version(self):
+        key = self.cache.key("# Title")
+        self.assertNotEqual(self.cache.key("# Other"), key)
+        original = pagecache.parser_version
+        try:
+            pagecache.parser_version = "something else"
+            self.assertNotEqual(self.cache.key("# Title"), key)
+        finally:
+            pagecache.parser_version = original
+
+    def test_parser_version_covers_title_extraction(self):
+        # extract_title lives in generatepage and its result is cached too
+        self.assertIn("generatepage", pagecache.parser_modules)
+        original = pagecache.parser_modules
+        try:
+            pagecache.parser_modules = tuple(
+                name for name in original if name != "generatepage"
+            )
+            self.assertNotEqual(pagecache.compute_parser_version(), pagecache.parser_version)
+        finally:
+            pagecache.parser_modules = original
+        self.assertEqual(pagecache.compute_parser_version(), pagecache.parser_version)
+
+    def test_generator_version_covers_page_output(self):
+        # Template substitution and streamed block splitting shape the
+        # written page, though not the cached body
+        for name in ("mappedsource", "outputfile", "template"):
+            self.assertIn(name, pagecache.generator_modules)
+            self.assertNotIn(name, pagecache.parser_modules)
+        self.assertNotEqual(pagecache.generator_version, pagecache.parser_version)
+
+    def test_template_change_reuses_bodies(self):
+        content = os.path.join(self.tmp.name, "content")
+        os.makedirs(content)
+        with open(os.path.join(content, "index.md"), "w") as f:
+            f.write("# Home\n\n* one\n* two")
+        template = os.path.join(self.tmp.name, "template.html")
+        public = os.path.join(self.tmp.name, "public")
+
+        outputs = []
+        for text in ("<title>{{ Title }}</title>{{ Content }}", "<h2>{{ Title }}</h2>{{ Content }}"):
+            with open(template, "w") as f:
+                f.write(text)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content, template, public, cache=self.cache)
+            with open(os.path.join(public, "index.html")) as f:
+                outputs.append(f.read())
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(
+            outputs,
+            [
+                "<title>Home</title><div><h1>Home</h1><ul><li>one</li><li>two</li></ul></div>",
+                "<h2>Home</h2><div><h1>Home</h1><ul><li>one</li><li>two</li></ul></div>",
+            ],
+        )
+
+    def test_parallel_build_counts_worker_lookups(self):
+        content = os.path.join(self.tmp.name, "content")
+        for name in ("a", "b", "c"):
+            os.makedirs(os.path.join(content, name))
+            with open(os.path.join(content, name, "index.md"), "w") as f:
+                f.write(f"# Page {name}\n\nbody")
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, "w") as f:
+            f.write("{{ Title }}{{ Content }}")
+        public = os.path.join(self.tmp.name, "public")
+
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content, template, public, jobs=2, cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+
+from previewserver import PreviewServer
+from sitebuilder import Site
+
+template_text = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestPreviewServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = PreviewServer(template_text, jobs=2, cache_size=2)
+        self.port = await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def request(self, method, path, body=b""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        head, _, body = response.partition(b"\r\n\r\n")
+        status = int(head.split()[1])
+        return status, body.decode("utf-8")
+
+    async def test_preview(self):
+        markdown = "# Draft\n\nSome *new* text"
+        status, body = await self.request("POST", "/preview", markdown.encode("utf-8"))
+        self.assertEqual(status, 200)
+        self.assertEqual(body, Site(template_text).render(markdown))
+
+    async def test_repeat_is_cached(self):
+        await self.request("POST", "/preview", b"# Same")
+        status, body = await self.request("POST", "/preview", b"# Same")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, "<title>Same</title><div><h1>Same</h1></div>")
+        self.assertEqual((self.server.hits, self.server.misses), (1, 1))
+
+    async def test_concurrent_requests(self):
+        bodies = [f"# Page {i}\n\ntext {i}".encode("utf-8") for i in range(6)]
+        results = await asyncio.gather(*(self.request("POST", "/preview", b) for b in bodies))
+        for i, (status, body) in enumerate(results):
+            self.assertEqual(status, 200)
+            self.assertIn(f"<h1>Page {i}</h1>", body)
+        self.assertEqual(len(self.server.pages), 2)
+
+    async def test_untitled_markdown(self):
+        status, body = await self.request("POST", "/preview", b"no title yet")
+        self.assertEqual(status, 422)
+        self.assertIn("No title found", body)
+
+    async def test_bad_requests(self):
+        self.assertEqual((await self.request("GET", "/preview"))[0], 405)
+        self.assertEqual((await self.request("POST", "/elsewhere"))[0], 404)
+        self.assertEqual((await self.request("POST", "/preview", b"\xff"))[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
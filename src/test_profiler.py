@@ -0,0 +1,62 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from generatepage import generate_pages_recursive
+from profiler import BuildProfile, PageProfile, stage
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_accumulates(self):
+        profile = PageProfile("page.md")
+        with profile.stage("parse"):
+            pass
+        with profile.stage("parse"):
+            pass
+        self.assertEqual(list(profile.stages), ["parse"])
+        self.assertEqual(len(profile.events), 2)
+        self.assertGreaterEqual(profile.wall(), 0)
+
+    def test_stage_without_profile(self):
+        with stage(None, "anything"):
+            pass
+
+    def test_build_profile_and_trace(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Title\n\nSome **text**")
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            profile = BuildProfile()
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                with profile.stage("pages"):
+                    generate_pages_recursive(
+                        content, template, os.path.join(root, "public"), profile=profile
+                    )
+                profile.print_summary()
+            self.assertEqual(len(profile.pages), 1)
+            self.assertIn("parse", profile.stage_totals())
+            self.assertIn("Slowest pages:", output.getvalue())
+
+            with open(os.path.join(root, "public", "index.html")) as f:
+                self.assertEqual(
+                    f.read(), "<title>Title</title><div><h1>Title</h1><p>Some <b>text</b></p></div>"
+                )
+
+            trace_path = os.path.join(root, "trace.json")
+            profile.write_trace(trace_path)
+            with open(trace_path) as f:
+                events = json.load(f)["traceEvents"]
+            self.assertEqual(events[0]["name"], "pages")
+            self.assertIn("write", [event["name"] for event in events])
+
+
+if __name__ == "__main__":
+    unittest.main()
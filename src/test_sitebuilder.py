@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from generatepage import generate_pages_recursive
+from pagecache import MemoryBodyCache
+from sitebuilder import Site
+
+template_text = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+class TestSite(unittest.TestCase):
+    def test_render(self):
+        site = Site(template_text)
+        self.assertEqual(
+            site.render("# Home\n\nWelcome **here**"),
+            "<title>Home</title><main><div><h1>Home</h1><p>Welcome <b>here</b></p></div></main>",
+        )
+
+    def test_render_reuses_cache(self):
+        site = Site(template_text)
+        first = site.render("# Home")
+        self.assertEqual(site.render("# Home"), first)
+        self.assertEqual((site.cache.hits, site.cache.misses), (1, 1))
+
+    def test_build_matches_disk_build(self):
+        files = {
+            "index.md": "# Home\n\n* one\n* two",
+            "blog/post.md": "# Post\n\n> quoted",
+            "blog/notes.txt": "not markdown",
+        }
+        pages = Site(template_text).build(files)
+        self.assertEqual(sorted(pages), ["blog/post.html", "index.html"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            public = os.path.join(tmp, "public")
+            template_path = os.path.join(tmp, "template.html")
+            with open(template_path, "w") as f:
+                f.write(template_text)
+            for path, markdown in files.items():
+                os.makedirs(os.path.join(content, os.path.dirname(path)), exist_ok=True)
+                with open(os.path.join(content, path), "w") as f:
+                    f.write(markdown)
+            generate_pages_recursive(content, template_path, public)
+            for path, html in pages.items():
+                with open(os.path.join(public, path)) as f:
+                    self.assertEqual(f.read(), html)
+
+    def test_untitled_page(self):
+        with self.assertRaises(Exception):
+            Site(template_text).render("no title")
+
+
+class TestMemoryBodyCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = MemoryBodyCache(maxsize=2)
+        keys = [cache.key(f"# Page {i}") for i in range(3)]
+        cache.put(keys[0], "0", "<div>0</div>")
+        cache.put(keys[1], "1", "<div>1</div>")
+        self.assertEqual(cache.get(keys[0]), ("0", "<div>0</div>"))
+        cache.put(keys[2], "2", "<div>2</div>")
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
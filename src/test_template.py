@@ -0,0 +1,41 @@
+import unittest
+
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_split(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.segments, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>text</p>"}),
+            "<title>Hi</title><body><p>text</p></body>",
+        )
+
+    def test_repeated_placeholder(self):
+        template = Template("{{ Title }} | {{ Title }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi | Hi")
+
+    def test_unknown_placeholder_is_kept(self):
+        template = Template("{{ Footer }}{{ Content }}")
+        self.assertEqual(template.render({"Content": "x"}), "{{ Footer }}x")
+
+    def test_no_placeholders(self):
+        template = Template("static")
+        self.assertEqual(template.render({}), "static")
+
+    def test_values_are_not_rescanned(self):
+        # Unlike chained str.replace, a title containing a placeholder stays literal
+        template = Template("{{ Title }}{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "{{ Content }}", "Content": "body"}),
+            "{{ Content }}body",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
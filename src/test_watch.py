@@ -0,0 +1,145 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from dirwatcher import DirWatcher
+from generatepage import page_dest_path
+from watch import DevBuilder, diff_snapshots, snapshot, update_snapshot
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.builder = DevBuilder(self.content, self.static, self.template, self.public)
+        self.quietly(self.builder.full_build)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+        # make sure the change is visible even on coarse mtime filesystems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def quietly(self, fn):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+
+    def test_page_dest_path(self):
+        self.assertEqual(
+            page_dest_path(os.path.join("content", "a", "b.md"), "content", "public"),
+            os.path.join("public", "a", "b.html"),
+        )
+
+    def test_diff_snapshots(self):
+        changed, removed = diff_snapshots({"a": (1, 1), "b": (1, 1)}, {"a": (2, 1), "c": (1, 1)})
+        self.assertEqual(sorted(changed), ["a", "c"])
+        self.assertEqual(removed, ["b"])
+
+    def test_update_snapshot(self):
+        files = snapshot(self.content)
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Edited post")
+        os.makedirs(os.path.join(self.content, "new"))
+        added = os.path.join(self.content, "new", "page.md")
+        self.write(added, "# New")
+        os.remove(os.path.join(self.content, "index.md"))
+        changed, removed = update_snapshot(
+            files,
+            self.content,
+            {post, os.path.join(self.content, "new"), os.path.join(self.content, "index.md")},
+        )
+        self.assertEqual(sorted(changed), [post, added])
+        self.assertEqual(removed, [os.path.join(self.content, "index.md")])
+        self.assertEqual(files, snapshot(self.content))
+
+    def test_update_snapshot_removed_directory(self):
+        files = snapshot(self.content)
+        blog = os.path.join(self.content, "blog")
+        os.remove(os.path.join(blog, "post.md"))
+        os.rmdir(blog)
+        changed, removed = update_snapshot(files, self.content, {blog, self.static})
+        self.assertEqual((changed, removed), ([], [os.path.join(blog, "post.md")]))
+        self.assertEqual(files, snapshot(self.content))
+
+    def test_dir_watcher_reports_changes(self):
+        watcher = DirWatcher.open([self.content, self.static])
+        if watcher is None:
+            self.skipTest("no inotify here")
+        try:
+            self.assertEqual(watcher.wait(0), set())
+            os.makedirs(os.path.join(self.content, "new"))
+            self.write(os.path.join(self.content, "blog", "post.md"), "# Edited post")
+            paths = watcher.wait(1)
+            self.assertIn(os.path.join(self.content, "new"), paths)
+            self.assertIn(os.path.join(self.content, "blog", "post.md"), paths)
+            # the new directory is watched too
+            self.write(os.path.join(self.content, "new", "page.md"), "# New")
+            self.assertIn(os.path.join(self.content, "new", "page.md"), watcher.wait(1))
+        finally:
+            watcher.close()
+
+    def test_rebuild_reported_paths(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Edited post")
+        self.write(os.path.join(self.content, "index.md"), "# Not reported")
+        self.assertEqual(self.quietly(lambda: self.builder.rebuild({post})), 1)
+        self.assertIn("<h1>Edited post</h1>", self.read("blog", "post.html"))
+        self.assertIn("<h1>Home</h1>", self.read("index.html"))
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.quietly(self.builder.rebuild), 0)
+
+    def test_page_edit_rebuilds_only_that_page(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Edited post")
+        self.assertEqual(self.quietly(self.builder.rebuild), 1)
+        self.assertIn("<h1>Edited post</h1>", self.read("blog", "post.html"))
+
+    def test_template_edit_rebuilds_all_pages(self):
+        self.write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        self.assertEqual(self.quietly(self.builder.rebuild), 2)
+        self.assertTrue(self.read("index.html").startswith("<h2>Home</h2>"))
+
+    def test_template_edit_uses_jobs(self):
+        builder = DevBuilder(self.content, self.static, self.template, self.public, jobs=2)
+        self.quietly(builder.full_build)
+        self.write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        self.assertEqual(self.quietly(lambda: builder.rebuild(set())), 2)
+        self.assertTrue(self.read("blog", "post.html").startswith("<h2>Post</h2>"))
+
+    def test_static_and_removed_files(self):
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        os.remove(os.path.join(self.content, "index.md"))
+        self.assertEqual(self.quietly(self.builder.rebuild), 2)
+        self.assertEqual(self.read("index.css"), "body { margin: 0 }")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_broken_page_does_not_stop_rebuild(self):
+        self.write(os.path.join(self.content, "index.md"), "no title")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Still fine")
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(self.quietly(self.builder.rebuild), 1)
+        self.assertIn("Still fine", self.read("blog", "post.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
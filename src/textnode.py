@@ -10,6 +10,9 @@ class TextType(Enum):
     IMAGE = 'image'
     
 class TextNode():
+    # Every inline span becomes a TextNode, so skip the per-instance __dict__
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type: TextType, url=None):
         self.text = text
         self.text_type = text_type
@@ -0,0 +1,233 @@
+import functools
+import http.server
+import os
+import shutil
+import threading
+import time
+import traceback
+
+from copystatic import copy_files_recursive
+from dirwatcher import DirWatcher
+from generatepage import generate_pages_recursive, page_dest_path, render_page
+from template import Template
+
+
+def snapshot(dir_path):
+    # path -> (mtime, size) for every file under dir_path
+    files = {}
+    if not os.path.isdir(dir_path):
+        return files
+    stack = [dir_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old, new):
+    changed = [path for path, info in new.items() if old.get(path) != info]
+    removed = [path for path in old if path not in new]
+    return changed, removed
+
+
+def update_snapshot(files, dir_path, paths):
+    # Re-stats only the reported paths (files or whole directories) under
+    # dir_path, updating files in place. Returns (changed, removed) like
+    # diff_snapshots.
+    changed = []
+    removed = []
+    prefix = os.path.join(dir_path, "")
+    for path in paths:
+        if not path.startswith(prefix):
+            continue
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            stat = None
+        if stat is not None and not os.path.isdir(path):
+            info = (stat.st_mtime_ns, stat.st_size)
+            if files.get(path) != info:
+                files[path] = info
+                changed.append(path)
+            continue
+        # A directory, or something that is gone: compare everything below it
+        old = {}
+        if path in files:
+            old[path] = files[path]
+        below = os.path.join(path, "")
+        old.update((known, info) for known, info in files.items() if known.startswith(below))
+        new = snapshot(path) if stat is not None else {}
+        subtree_changed, subtree_removed = diff_snapshots(old, new)
+        for known in subtree_removed:
+            del files[known]
+        files.update(new)
+        changed.extend(subtree_changed)
+        removed.extend(subtree_removed)
+    return changed, removed
+
+
+class DevBuilder:
+    # Keeps the compiled template and file snapshots in memory between
+    # rebuilds, so an edit only touches the pages and assets it affects.
+    def __init__(
+        self, dir_path_content, dir_path_static, template_path, dest_dir_path, jobs=1, cache=None
+    ):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.dest_dir_path = dest_dir_path
+        self.jobs = jobs
+        self.cache = cache
+        self.template = None
+        self.content_files = {}
+        self.static_files = {}
+        self.template_info = None
+
+    def full_build(self):
+        if os.path.exists(self.dest_dir_path):
+            shutil.rmtree(self.dest_dir_path)
+        copy_files_recursive(self.dir_path_static, self.dest_dir_path)
+        generate_pages_recursive(
+            self.dir_path_content,
+            self.template_path,
+            self.dest_dir_path,
+            jobs=self.jobs,
+            cache=self.cache,
+        )
+        self.template = Template.load(self.template_path)
+        self.template_info = self.stat_template()
+        self.content_files = snapshot(self.dir_path_content)
+        self.static_files = snapshot(self.dir_path_static)
+
+    def stat_template(self):
+        stat = os.stat(self.template_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def rebuild(self, paths=None):
+        # Returns the number of outputs touched, 0 when nothing changed.
+        # `paths` are the changed paths a DirWatcher reported; without them
+        # both trees are walked and compared with the last snapshot.
+        touched = 0
+
+        template_info = self.stat_template()
+        template_changed = template_info != self.template_info
+        if template_changed:
+            self.template = Template.load(self.template_path)
+            self.template_info = template_info
+
+        if paths is None:
+            content_files = snapshot(self.dir_path_content)
+            changed, removed = diff_snapshots(self.content_files, content_files)
+            self.content_files = content_files
+        else:
+            changed, removed = update_snapshot(self.content_files, self.dir_path_content, paths)
+        if template_changed:
+            # Every page changes, so render them all with the worker pool
+            try:
+                generate_pages_recursive(
+                    self.dir_path_content,
+                    self.template_path,
+                    self.dest_dir_path,
+                    jobs=self.jobs,
+                    cache=self.cache,
+                    template=self.template,
+                )
+                touched += sum(1 for src_path in self.content_files if src_path.endswith(".md"))
+            except Exception:
+                traceback.print_exc()
+            changed = []
+        for src_path in changed:
+            if not src_path.endswith(".md"):
+                continue
+            dest_path = page_dest_path(src_path, self.dir_path_content, self.dest_dir_path)
+            print(f" * {src_path} -> {dest_path}")
+            try:
+                render_page(src_path, self.template, dest_path, cache=self.cache)
+            except Exception:
+                # A broken page shouldn't stop the others; report it and move on
+                traceback.print_exc()
+                continue
+            touched += 1
+        for src_path in removed:
+            if src_path.endswith(".md"):
+                dest_path = page_dest_path(src_path, self.dir_path_content, self.dest_dir_path)
+                touched += remove_output(dest_path)
+
+        if paths is None:
+            static_files = snapshot(self.dir_path_static)
+            changed, removed = diff_snapshots(self.static_files, static_files)
+            self.static_files = static_files
+        else:
+            changed, removed = update_snapshot(self.static_files, self.dir_path_static, paths)
+        for src_path in changed:
+            dest_path = os.path.join(
+                self.dest_dir_path, os.path.relpath(src_path, self.dir_path_static)
+            )
+            print(f" * {src_path} -> {dest_path}")
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy(src_path, dest_path)
+            touched += 1
+        for src_path in removed:
+            dest_path = os.path.join(
+                self.dest_dir_path, os.path.relpath(src_path, self.dir_path_static)
+            )
+            touched += remove_output(dest_path)
+
+        return touched
+
+
+def remove_output(dest_path):
+    if not os.path.isfile(dest_path):
+        return 0
+    print(f" - {dest_path}")
+    os.remove(dest_path)
+    return 1
+
+
+def serve(directory, port):
+    # Serve the output directory from a background thread for the whole session
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def watch(builder, port, interval=0.05):
+    print("Building site...")
+    watcher = DirWatcher.open([builder.dir_path_content, builder.dir_path_static])
+    if watcher is None:
+        print("No file change notification here; polling for changes instead")
+    builder.full_build()
+    server = serve(builder.dest_dir_path, port)
+    print(f"Serving {builder.dest_dir_path} at http://localhost:{port}/ (Ctrl+C to stop)")
+    try:
+        while True:
+            if watcher is None:
+                time.sleep(interval)
+                paths = None
+            else:
+                # Sleeps in the kernel until something changes. The template
+                # is still checked every interval, with a single stat.
+                paths = watcher.wait(interval)
+            start = time.perf_counter()
+            try:
+                touched = builder.rebuild(paths)
+            except Exception:
+                # e.g. the template was deleted mid-save; keep watching
+                traceback.print_exc()
+                continue
+            if touched:
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"Rebuilt {touched} output(s) in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        server.shutdown()
+        if watcher is not None:
+            watcher.close()